@@ -16,6 +16,7 @@ n = 100_000
 %timeit core.distinct_pandas(*make_left_right(n=n), subset=[0, 1])
 %timeit core.distinct_pandas_unstack(*make_left_right(n=n), subset=[0, 1])
 %timeit core.distinct_counter(*make_left_right(n=n), subset=[0, 1])
+%timeit core.distinct(*make_left_right(n=n), subset=[0])
 
 # shape = 100, 2
 %timeit core.distinct(left, right, subset=[0, 1])
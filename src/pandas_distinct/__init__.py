@@ -1,6 +1,9 @@
 from ._version import get_versions
 import pandas as pd
-from .core import distinct
+from .core import (  # noqa: F401
+    DistinctIndex, DistinctResult, IncrementalDistinct, adistinct, distinct,
+)
+from .sketch import estimate_distinct  # noqa: F401
 
 __version__ = get_versions()['version']
 del get_versions
@@ -0,0 +1,379 @@
+"""Caches of intermediate results.
+
+RowKeyCache
+DiskCache
+
+Hashing the rows is the most expensive stage of most implementations. A
+`RowKeyCache` keeps the row keys of the columns already hashed, so diffing
+the same frame again, against other frames or with other engines, skips
+it. It's opt-in: install one with `set_row_key_cache` or a ``with`` block.
+
+A `DiskCache` keeps the results of `pandas_distinct.core.distinct` on disk,
+keyed by fingerprints of the inputs, to reuse them across processes.
+"""
+import os
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+CacheInfo = namedtuple(
+    "CacheInfo",
+    ["hits", "misses", "evictions", "nbytes", "max_bytes", "entries"],
+)
+
+_active = None
+
+
+def get_row_key_cache():
+    """The installed `RowKeyCache`, or None."""
+    return _active
+
+
+def set_row_key_cache(cache):
+    """Install `cache` (or None to disable caching).
+
+    Returns
+    -------
+    RowKeyCache or None
+        The cache installed before.
+    """
+    global _active
+    previous, _active = _active, cache
+    return previous
+
+
+def _owner(arr):
+    """Array owning the memory of `arr`."""
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+_CHECKSUM_BLOCK = 2 ** 16
+_CHECKSUM_WEIGHTS = np.arange(_CHECKSUM_BLOCK, dtype=np.uint64)
+_CHECKSUM_WEIGHTS *= np.uint64(0x9E3779B97F4A7C15)
+_CHECKSUM_WEIGHTS |= np.uint64(1)
+
+
+class _Words:
+    """The memory of a 1-D array as unsigned words, one row per item."""
+
+    def __init__(self, arr):
+        itemsize = arr.dtype.itemsize
+        width = next(w for w in (8, 4, 2, 1) if itemsize % w == 0)
+        self.base = arr
+        self.__array_interface__ = {
+            "version": 3,
+            "data": (arr.__array_interface__["data"][0], True),
+            "shape": arr.shape + (itemsize // width,),
+            "strides": arr.strides + (width,),
+            "typestr": np.dtype("u{}".format(width)).str,
+        }
+
+
+def _checksum(arr):
+    """Checksum of the memory of a 1-D array.
+
+    The items, as unsigned words (pointers for object arrays), are
+    multiplied by odd weights depending on their position and XOR-reduced,
+    so overwritten and swapped values change it, at a small fraction of
+    the cost of hashing the rows.
+    """
+    words = np.asarray(_Words(arr))
+    out = np.empty((_CHECKSUM_BLOCK, words.shape[1]), dtype=np.uint64)
+    checksum = 0
+    for start in range(0, len(words), _CHECKSUM_BLOCK):
+        block = words[start:start + _CHECKSUM_BLOCK]
+        product = out[:len(block)]
+        np.multiply(block, _CHECKSUM_WEIGHTS[:len(block), None], out=product)
+        reduced = np.bitwise_xor.reduce(product, axis=None)
+        checksum ^= int(reduced) * (2 * start + 1) & 0xFFFFFFFFFFFFFFFF
+    return checksum
+
+
+def _array_token(arr):
+    interface = arr.__array_interface__
+    return (interface["data"][0], arr.shape, arr.strides, arr.dtype.str)
+
+
+def _column_token(series):
+    """Identify the buffers of a column.
+
+    Returns
+    -------
+    token : tuple or None
+        None if the column can't be identified without reading it.
+    refs : list
+        Weak references to the owners of the buffers, or the buffers
+        themselves when they can't be weakly referenced. The token is
+        valid as long as they're alive, so a reused address isn't taken
+        for the same buffer.
+    """
+    dtype = series.dtype
+    # numpy buffers can be written in place, their checksum is part of the
+    # token
+    if isinstance(dtype, np.dtype):
+        arr = series.to_numpy()
+        return (
+            _array_token(arr) + (_checksum(arr),),
+            [weakref.ref(_owner(arr))],
+        )
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        # categories are immutable, keep them alive with the entry
+        codes = series.array.codes
+        token = _array_token(codes) + (_checksum(codes),)
+        return (
+            ("category",) + token + (id(dtype.categories),),
+            [weakref.ref(_owner(codes)), dtype.categories],
+        )
+
+    if hasattr(series.array, "__arrow_array__"):
+        # arrow buffers are immutable, keep them alive with the entry
+        chunks = series.array.__arrow_array__().chunks
+        buffers = [
+            buf for chunk in chunks for buf in chunk.buffers()
+            if buf is not None
+        ]
+        token = ("arrow", str(dtype), tuple(
+            (buf.address, buf.size) for buf in buffers
+        ), tuple(chunk.offset for chunk in chunks))
+        return token, buffers
+
+    return None, []
+
+
+def _is_alive(ref):
+    return not isinstance(ref, weakref.ref) or ref() is not None
+
+
+def _pinned_nbytes(refs):
+    """Size of the objects kept alive by the references of a token."""
+    return sum(
+        ref.nbytes if isinstance(ref, pd.Index) else ref.size
+        for ref in refs if not isinstance(ref, weakref.ref)
+    )
+
+
+class RowKeyCache:
+    """LRU cache of row keys, bounded in bytes.
+
+    Entries are keyed by the buffers of the hashed columns, their
+    addresses, shapes and dtypes, and the key size, so any frame sharing
+    them (e.g. a column selection of the same frame) hits the cache. An
+    entry is dropped as soon as the buffers it was computed from are freed
+    or replaced. Values written in place into numpy buffers are detected
+    by a checksum of the buffers, checked on every lookup; Arrow buffers
+    are immutable.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Size of the row keys kept, and of the immutable buffers kept alive
+        for them, before evicting the least recently used entries.
+
+    Examples
+    --------
+    >>> from pandas_distinct.core import distinct_counter
+    >>> left = pd.DataFrame({"a": range(1_000)})
+    >>> right = pd.DataFrame({"a": range(10, 1_010)})
+    >>> with RowKeyCache() as cache:
+    ...     _ = distinct_counter(left, right)
+    ...     _ = distinct_counter(left, right.iloc[::2])
+    >>> cache.info().hits
+    1
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        self._previous = set_row_key_cache(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        set_row_key_cache(self._previous)
+
+    def token(self, df, *extra):
+        """Cache key of the columns of `df`, None if not cacheable.
+
+        Returns
+        -------
+        token : tuple or None
+        refs : list
+        """
+        tokens, refs = [], []
+        for i in range(df.shape[1]):
+            token, column_refs = _column_token(df.iloc[:, i])
+            if token is None:
+                return None, []
+            tokens.append(token)
+            refs.extend(column_refs)
+        return (tuple(tokens),) + extra, refs
+
+    def get(self, token):
+        """Cached keys of `token`, or None."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and not all(map(_is_alive, entry[1])):
+                self._drop(token)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token, keys, refs):
+        """Cache `keys` for `token`.
+
+        Returns
+        -------
+        keys : numpy.ndarray
+            Read-only view of `keys`, to share instead of `keys`.
+        """
+        keys = keys.view()
+        keys.flags.writeable = False
+        size = keys.nbytes + _pinned_nbytes(refs)
+        if size > self.max_bytes:
+            return keys
+        with self._lock:
+            # entries of freed buffers can't be hit anymore
+            for dead in [t for t, (_, entry_refs, _) in self._entries.items()
+                         if not all(map(_is_alive, entry_refs))]:
+                self._drop(dead)
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (keys, refs, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return keys
+
+    def _drop(self, token):
+        _, _, size = self._entries.pop(token)
+        self.nbytes -= size
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        """Hit and miss statistics.
+
+        Returns
+        -------
+        CacheInfo
+        """
+        return CacheInfo(
+            self.hits, self.misses, self.evictions, self.nbytes,
+            self.max_bytes, len(self._entries),
+        )
+
+
+class DiskCache:
+    """Arrays stored on disk under string keys, bounded in bytes.
+
+    Each entry is an ``.npz`` file written atomically, so several processes
+    can share a directory. When the directory grows over `max_bytes` the
+    least recently used entries, by modification time, are removed.
+
+    Parameters
+    ----------
+    path : path-like
+        Directory, created if needed.
+    max_bytes : int
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, path, max_bytes=2 ** 30):
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + self.suffix)
+
+    def get(self, key):
+        """Arrays stored under `key`, or None.
+
+        Returns
+        -------
+        list of numpy.ndarray or None
+        """
+        try:
+            with np.load(self._file(key)) as data:
+                arrays = [data["arr_{}".format(i)] for i in range(len(data))]
+            os.utime(self._file(key))
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays):
+        """Store `arrays` under `key` and evict old entries if needed."""
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, *arrays)
+            os.replace(tmp, self._file(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix):
+                    try:
+                        stat = entry.stat()
+                    except OSError:  # removed meanwhile
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @property
+    def nbytes(self):
+        """Size of the entries on disk."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove the least recently used entries over `max_bytes`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove every entry."""
+        for _, _, path in self._entries():
+            os.unlink(path)
@@ -1,9 +1,17 @@
 """Distinct implementations.
 
-There're 5 implementations.
+There're 11 implementations.
 
 distinct
 distinct_counter
+DistinctIndex
+IncrementalDistinct
+distinct_many
+distinct_keyed
+distinct_by
+distinct_dask
+distinct_void
+distinct_merkle
 distinct_merge
 
 distinct_pandas
@@ -16,45 +24,21 @@ Todo
 - [ ] Check build_freq_rows functions.
 - [ ] Check repeat_rows functions.
 """
-from itertools import chain, zip_longest
-from collections import Counter, defaultdict
-
+import asyncio
+import hashlib
+import json
+import numbers
+import os
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import cached_property, partial
+from itertools import chain
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import CategoricalDtype, is_string_dtype
 
-
-def _update_key_counter(idx, key, same, opposite):
-    """Increase/decrease counters.
-
-    Deletes intersection elements. Inplace modifications.
-
-    Parameters
-    ----------
-    idx : int
-    key : tuple
-        key belong to `same`.  same : dict
-        is the set from `row` comes from.
-    opposite : dict
-        is the set where `row` doesn't belong to.
-
-    Returns
-    -------
-    key : tuple
-    """
-
-    # - If key is in opposite then reduce its counter by one to remove the
-    # element.
-    # - If key is not in opposite then increase the counter of same by one as
-    # it is a difference.
-    if key is None:
-        # early stop
-        return key
-
-    if opposite.get(key):
-        opposite[key].pop(0)  # FIFO
-    else:
-        same[key].append(idx)
-
-    return key
+from .cache import DiskCache, get_row_key_cache
 
 
 def dict2dataframe(dict_idx, original):
@@ -88,18 +72,167 @@ def dict2dataframe(dict_idx, original):
     return out
 
 
-def distinct(left, right, subset=None):
+class DistinctResult:
+    """Distinct rows of two objects, materialized on demand.
+
+    Holds the positions of the distinct rows and builds each attribute on
+    first access only, caching it. It unpacks as ``left_only, right_only``
+    like the tuple returned by `distinct`.
+
+    Parameters
+    ----------
+    left, right : pandas.DataFrame, pandas.Series, pandas.Index or array
+    left_pos, right_pos : numpy.ndarray
+        Sorted positions of the distinct rows of each side.
+    matched_pos : tuple of numpy.ndarray, optional
+        Positions of the left and right rows cancelling out each other. If
+        given, the result unpacks as ``left_only, right_only, matched``.
+    """
+
+    def __init__(self, left, right, left_pos, right_pos, matched_pos=None):
+        self.left = left
+        self.right = right
+        self.left_pos = left_pos
+        self.right_pos = right_pos
+        self.matched_pos = matched_pos
+
+    def _fields(self):
+        fields = ("left_only", "right_only", "matched")
+        return fields[:len(self)]
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self._fields())
+
+    def __len__(self):
+        return 2 if self.matched_pos is None else 3
+
+    def __getitem__(self, i):
+        # build the requested items only
+        fields = self._fields()[i]
+        if isinstance(i, slice):
+            return tuple(getattr(self, field) for field in fields)
+        return getattr(self, fields)
+
+    def __repr__(self):
+        return "DistinctResult(left_only={}, right_only={})".format(
+            len(self.left_pos), len(self.right_pos)
+        )
+
+    @cached_property
+    def left_only(self):
+        """Rows of `left` not in `right`."""
+        return _take_rows(self.left, self.left_pos)
+
+    @cached_property
+    def right_only(self):
+        """Rows of `right` not in `left`."""
+        return _take_rows(self.right, self.right_pos)
+
+    @cached_property
+    def matched(self):
+        """Positions of the pairs of rows cancelling out each other.
+
+        Columns ``left`` and ``right``, sorted by ``left``. None unless
+        `distinct` was called with ``return_matched=True``.
+        """
+        if self.matched_pos is None:
+            return None
+        left_idx, right_idx = self.matched_pos
+        return pd.DataFrame({"left": left_idx, "right": right_idx})
+
+    @cached_property
+    def left_mask(self):
+        """Boolean array, True for the distinct rows of `left`."""
+        mask = np.zeros(len(self.left), dtype=bool)
+        mask[self.left_pos] = True
+        return mask
+
+    @cached_property
+    def right_mask(self):
+        """Boolean array, True for the distinct rows of `right`."""
+        mask = np.zeros(len(self.right), dtype=bool)
+        mask[self.right_pos] = True
+        return mask
+
+    @cached_property
+    def counts(self):
+        """Number of rows, distinct rows and matched rows of each side."""
+        left_only, right_only = len(self.left_pos), len(self.right_pos)
+        return pd.DataFrame(
+            {
+                "rows": [len(self.left), len(self.right)],
+                "only": [left_only, right_only],
+                "matched": [
+                    len(self.left) - left_only, len(self.right) - right_only
+                ],
+            },
+            index=["left", "right"],
+        )
+
+    def summary(self):
+        """Counts with the share of distinct rows of each side.
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        out = self.counts.copy()
+        out["only_pct"] = 100 * out["only"] / out["rows"].where(
+            out["rows"] > 0
+        )
+        return out
+
+
+def distinct(left, right, subset=None, lazy=False, return_matched=False,
+             on=None, compare=None, by=None, engine="python",
+             cache_dir=None):
     """Get distinct rows between dataframes.
 
+    Rows are compared exactly, column by column, and missing values are
+    equal to each other. One-dimensional inputs (Series, Index or arrays)
+    and single column subsets are compared on the column values directly.
+    Categorical columns are compared on their codes.
+
     Parameters
     ----------
-    left : pandas.DataFrame
-    righ : pandas.DataFrame
+    left : pandas.DataFrame, pandas.Series, pandas.Index or numpy.ndarray
+    righ : pandas.DataFrame, pandas.Series, pandas.Index or numpy.ndarray
+        Dask DataFrames are diffed lazily, see `distinct_dask`.
     subset : iterable
+        Ignored for one-dimensional inputs.
+    lazy : bool
+        If True, return a `DistinctResult` building the outputs on demand.
+    return_matched : bool
+        If True, also return which row of `left` cancelled out which row of
+        `right`, as a DataFrame of positions with columns ``left`` and
+        ``right``.
+    on : list, optional
+        Key columns. If given, rows are matched by key instead of by value
+        and the changed cells of matched rows are returned too, see
+        `distinct_keyed`.
+    compare : list, optional
+        Columns compared between matched rows when `on` is given.
+    by : list, optional
+        Columns splitting both frames in groups diffed independently and
+        in parallel, see `distinct_by`.
+    engine : {"python", "duckdb"}
+        "duckdb" runs the difference in DuckDB, see
+        `pandas_distinct.sql.distinct_duckdb`.
+    cache_dir : path-like or pandas_distinct.cache.DiskCache, optional
+        Directory where the positions of the distinct rows are stored,
+        keyed by a fingerprint of the compared values and dtypes of both
+        inputs. Inputs with the same fingerprint are only hashed. Object
+        values other than strings, bytes and numbers aren't cached. Not
+        supported with `on`, `by`, dask inputs or the duckdb engine.
 
     Returns
     -------
-    left_diff, right_diff : pandas.DataFrame
+    left_diff, right_diff : same type as the inputs
+        Or a `DistinctResult`, which unpacks the same way.
+    matched : pandas.DataFrame
+        Only if `return_matched`.
+    changes : pandas.DataFrame
+        Only if `on` is given, see `distinct_keyed`.
 
     Examples
     --------
@@ -125,37 +258,214 @@ def distinct(left, right, subset=None):
     1  1  2  3
 
     """
-    # for the sake of efficiency
-    right_dict = defaultdict(list)
-    left_dict = defaultdict(list)
+    _check_options(left, lazy, return_matched, on, by, engine, cache_dir)
 
-    if subset is not None:
-        left_gen = left[subset].itertuples(index=False, name="left")
-        right_gen = right[subset].itertuples(index=False, name="right")
-        fillvalue = None
+    if on is not None:
+        return distinct_keyed(left, right, on, compare)
+
+    if by is not None:
+        return distinct_by(
+            left, right, by, subset, lazy=lazy, return_matched=return_matched
+        )
+
+    if _is_dask(left):
+        return distinct_dask(left, right, subset)
+
+    if engine == "duckdb":
+        from .sql import distinct_duckdb
+        return distinct_duckdb(left, right, subset, lazy=lazy)
+
+    if not isinstance(left, pd.DataFrame):
+        left, right = _as_1d(left), _as_1d(right)
+        subset = None
+
+    if cache_dir is not None:
+        positions = _cached_positions(
+            left, right, subset, return_matched, cache_dir
+        )
+    elif not isinstance(left, pd.DataFrame):
+        positions = _distinct_values(left, right, return_matched)
     else:
-        left_gen = left.itertuples(index=False, name="left")
-        right_gen = right.itertuples(index=False, name="right")
-        fillvalue = None
+        positions = _distinct_frames(left, right, subset, return_matched)
+
+    result = DistinctResult(left, right, *positions)
+    if lazy:
+        return result
+    return tuple(result)
+
+
+def _check_options(left, lazy, return_matched, on, by, engine, cache_dir):
+    """Raise a ValueError for options of `distinct` that don't apply
+    together."""
+    if engine not in ("python", "duckdb"):
+        raise ValueError(
+            "engine must be 'python' or 'duckdb', got {!r}".format(engine)
+        )
+    if on is not None and by is not None:
+        raise ValueError("on and by can't be given together")
+    if on is not None and (lazy or return_matched):
+        raise ValueError("lazy and return_matched don't apply with on")
+    if engine == "duckdb":
+        if on is not None or by is not None or _is_dask(left):
+            raise ValueError("engine='duckdb' isn't supported with on, by "
+                             "or dask")
+        if return_matched:
+            raise ValueError("return_matched isn't supported with duckdb")
+    if cache_dir is not None:
+        if on is not None or by is not None:
+            raise ValueError("cache_dir isn't supported with on or by")
+        if _is_dask(left) or engine != "python":
+            raise ValueError("cache_dir isn't supported with dask or duckdb")
+
+
+# bumped when the results of distinct change, to ignore older cached ones
+_FINGERPRINT_VERSION = 2
+
+
+def _object_types(values):
+    """Hashes of the type of each value of an object array.
 
-    union_gen = zip_longest(left_gen, right_gen, fillvalue=fillvalue)
+    Returns
+    -------
+    numpy.ndarray or None
+        None if a value isn't a string, bytes, a number or missing, as its
+        hash may not tell it apart from unequal values.
+    """
+    values = np.asarray(values, dtype=object)
+    missing = pd.isna(values)
+    names = []
+    for value, isna in zip(values, missing):
+        if not (isna or isinstance(value, (str, bytes, numbers.Number))):
+            return None
+        names.append(type(value).__qualname__)
+    return pd.util.hash_array(np.array(names, dtype=object))
 
-    for i, (left_row, right_row) in enumerate(union_gen):
 
-        # if both rows are equal, they cancel out
-        if left_row == right_row:
-            continue
+def _fingerprint(obj, subset=None):
+    """Content hash of the compared values of `obj`, in order, and their
+    names and dtypes, with the type of every object value.
+
+    Returns
+    -------
+    bytes or None
+        None if the values can't be fingerprinted, see `_object_types`.
+    """
+    if isinstance(obj, pd.DataFrame):
+        df = obj if subset is None else obj[subset]
+    else:
+        df = pd.DataFrame({None: pd.Series(obj, copy=False)})
+    schema = [[str(col), str(dtype)] for col, dtype in df.dtypes.items()]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(schema).encode())
+    for col, dtype in enumerate(df.dtypes):
+        values = df.iloc[:, col]
+        if isinstance(dtype, CategoricalDtype):
+            values = dtype.categories
+        if values.dtype == object:
+            types = _object_types(values)
+            if types is None:
+                return None
+            digest.update(types)
+    digest.update(np.ascontiguousarray(_hash_rows(df, hash_bits=128)))
+    return digest.digest()
+
+
+def _diff_fingerprint(left, right, subset, return_matched):
+    """Key of the results of `distinct` for a `pandas_distinct.cache`, or
+    None if an input can't be fingerprinted."""
+    fingerprints = _fingerprint(left, subset), _fingerprint(right, subset)
+    if None in fingerprints:
+        return None
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(json.dumps([_FINGERPRINT_VERSION, return_matched]).encode())
+    for fingerprint in fingerprints:
+        digest.update(fingerprint)
+    return digest.hexdigest()
+
+
+def _cached_positions(left, right, subset, return_matched, cache_dir):
+    """Positions of the distinct rows, see `distinct`, loaded from or
+    stored in `cache_dir`.
+
+    Inputs that can't be fingerprinted are diffed without the cache.
+    """
+    cache = cache_dir
+    if not isinstance(cache, DiskCache):
+        cache = DiskCache(cache_dir)
+    key = _diff_fingerprint(left, right, subset, return_matched)
+    positions = None if key is None else _load_positions(cache, key)
+
+    if positions is None:
+        if not isinstance(left, pd.DataFrame):
+            positions = _distinct_values(left, right, return_matched)
+        else:
+            positions = _distinct_frames(left, right, subset, return_matched)
+        if key is not None:
+            cache.put(key, list(chain(positions[:2], *positions[2:])))
+    return positions
+
+
+def _load_positions(cache, key):
+    """Positions stored by `distinct` in a `DiskCache`, or None."""
+    arrays = cache.get(key)
+    if arrays is None:
+        return None
+    if len(arrays) == 4:
+        return arrays[0], arrays[1], (arrays[2], arrays[3])
+    return tuple(arrays)
+
+
+def _distinct_frames(left, right, subset=None, return_matched=False):
+    """Positions of the distinct rows of two DataFrames.
+
+    See `_distinct_positions` for the output.
+    """
+    left_keys, right_keys = _key_frames(left, right, subset)
 
-        # IF THEY ARE DIFFERENT:
-        # - if already seen, the number of the opposite set is reduced.
-        # - if unseen, increase your own number
-        _update_key_counter(i, right_row, right_dict, left_dict)
-        _update_key_counter(i, left_row, left_dict, right_dict)
+    if left_keys.shape[1] == 1:
+        return _distinct_values(
+            left_keys.iloc[:, 0], right_keys.iloc[:, 0], return_matched
+        )
 
-    out_left = dict2dataframe(left_dict, left)
-    out_right = dict2dataframe(right_dict, right)
+    left_codes, right_codes, n_keys = _row_codes(left_keys, right_keys)
+    return _distinct_positions(
+        left_codes, right_codes, n_keys, return_matched
+    )
 
-    return out_left, out_right
+
+def _row_codes(left, right):
+    """Codes of the rows of two frames of the same columns, exactly equal
+    rows getting the same code.
+
+    Each column is factorized over both sides, missing values being equal
+    as in `_distinct_values`, and the column codes are combined.
+
+    Returns
+    -------
+    left_codes, right_codes : numpy.ndarray
+    n_codes : int
+    """
+    codes = np.zeros(len(left) + len(right), dtype=np.int64)
+    n_codes = 1
+    for i in range(left.shape[1]):
+        values = pd.concat(
+            [left.iloc[:, i], right.iloc[:, i]], ignore_index=True
+        )
+        column_codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        if n_codes * len(uniques) >= 2 ** 63:
+            # make room for the next column
+            codes, n_codes = _compact_codes(codes)
+        codes = codes * len(uniques) + column_codes
+        n_codes *= len(uniques)
+    codes, n_codes = _compact_codes(codes)
+    return codes[:len(left)], codes[len(left):], n_codes
+
+
+def _compact_codes(codes):
+    """Renumber `codes` as ``0..n_codes-1``."""
+    codes, uniques = pd.factorize(codes)
+    return codes, len(uniques)
 
 
 def build_freq_rows_pivot(left, right, subset):
@@ -263,37 +573,1811 @@ def distinct_pandas_unstack(left, right, subset=None):
     return a_distinct_df, b_distinct_df
 
 
-def distinct_counter(left, right, subset=None):
+# second word of the 128-bit keys: another key for strings and a salt to
+# remix the numeric column hashes.
+_HASH_KEY_LOW = "0123456789123456"  # pandas default
+_HASH_KEY_HIGH = "pandas-distinct!"
+_HASH_SALT_HIGH = np.uint64(0x9E3779B97F4A7C15)
+# remix the hashes of the values of object columns that aren't strings or
+# numbers, of non integral floats and of datetimes and timedeltas, so they
+# don't collide with the integers of the same bits
+_HASH_SALT_OBJECT = np.uint64(0xC2B2AE3D27D4EB4F)
+_HASH_SALT_FLOAT = np.uint64(0x165667B19E3779F9)
+_HASH_SALT_TIME = {
+    "M": np.uint64(0x27D4EB2F165667C5),
+    "m": np.uint64(0x85EBCA77C2B2AE63),
+}
+# hash of every missing value, None, NaN, NaT or NA
+_MISSING_HASH = pd.util.hash_array(np.array([np.nan]))[0]
+
+_INT64_BOUND = 2.0 ** 63
+
+
+def _object_repr(value):
+    """String standing for an object value that isn't a string or a number
+    held by a 64-bit integer or float, when hashing."""
+    if isinstance(value, numbers.Number):
+        return repr(value)
+    return "{}:{!r}".format(type(value).__qualname__, value)
+
+
+def _number_hashes(values, hash_key):
+    """Hash of each value of a boolean, integer or floating array.
+
+    Values are hashed by value: integral ones as 64-bit integers, whatever
+    their dtype, so ``True``, ``1`` and ``1.0`` get the same hash, other
+    floats from their float64 bits with a salt, and larger integers as
+    objects with `hash_key`, see `_value_hashes`.
+    """
+    kind = values.dtype.kind
+    if kind == "f":
+        values = values.astype(np.float64) + 0.0  # -0.0 and 0.0 are equal
+        integral = np.floor(values) == values
+        integral &= np.abs(values) < _INT64_BOUND
+        bits = values.view(np.uint64) ^ _HASH_SALT_FLOAT
+        hashes = pd.util.hash_array(bits)
+        integers = values[integral].astype(np.int64)
+        hashes[integral] = pd.util.hash_array(integers)
+        hashes[np.isnan(values)] = _MISSING_HASH
+        return hashes
+    if kind == "u" and values.dtype.itemsize == 8:
+        large = values >= np.uint64(_INT64_BOUND)
+        hashes = pd.util.hash_array(values.astype(np.int64))
+        if large.any():
+            large_values = values[large].astype(object)
+            hashes[large] = _value_hashes(large_values, hash_key)
+        return hashes
+    return pd.util.hash_array(values.astype(np.int64, copy=False))
+
+
+def _value_hashes(values, hash_key):
+    """Hash of each value of an object or string array.
+
+    Strings are hashed as they are, numbers as in `_number_hashes` and any
+    other value from `_object_repr` with a salt, so ``1`` and ``"1"`` get
+    different hashes.
+    """
+    values = np.asarray(values, dtype=object)
+    missing = pd.isna(values)
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        hashes = pd.util.hash_array(values, hash_key=hash_key)
+        hashes[missing] = _MISSING_HASH
+        return hashes
+
+    hashes = np.full(len(values), _MISSING_HASH, dtype=np.uint64)
+    groups = {"str": [], "int": [], "float": [], "other": []}
+    for i in np.flatnonzero(~missing):
+        groups[_value_group(values[i])].append(i)
+    pos = np.array(groups["str"], dtype=np.intp)
+    hashes[pos] = pd.util.hash_array(values[pos], hash_key=hash_key)
+    for group, dtype in (("int", np.int64), ("float", np.float64)):
+        pos = np.array(groups[group], dtype=np.intp)
+        hashes[pos] = _number_hashes(
+            np.array([values[i] for i in pos], dtype=dtype), hash_key
+        )
+    pos = np.array(groups["other"], dtype=np.intp)
+    hashes[pos] = pd.util.hash_array(
+        np.array([_object_repr(values[i]) for i in pos], dtype=object),
+        hash_key=hash_key,
+    ) ^ _HASH_SALT_OBJECT
+    return hashes
+
+
+def _value_group(value):
+    """How `_value_hashes` hashes a non missing value."""
+    if isinstance(value, str):
+        return "str"
+    if not isinstance(value, numbers.Number):
+        return "other"
+    if isinstance(value, numbers.Integral):
+        if -_INT64_BOUND <= value < _INT64_BOUND:
+            return "int"
+    try:
+        as_float = float(value)
+    except (TypeError, ValueError, OverflowError):
+        return "other"
+    return "float" if as_float == value else "other"
+
+
+def _time_hashes(values, hash_key):
+    """Hash of each value of a datetime or timedelta Series, by value.
+
+    Values are cast to nanoseconds, and time zone aware datetimes to UTC,
+    so equal instants get the same hash whatever their unit or time zone.
+    Values overflowing nanoseconds are hashed as objects with `hash_key`.
+    """
+    tz = getattr(values.dtype, "tz", None)
+    if tz is not None:
+        values = values.dt.tz_convert(None)
+    kind = values.dtype.kind
+    try:
+        values = values.dt.as_unit("ns")
+    except (OverflowError, pd.errors.OutOfBoundsDatetime,
+            pd.errors.OutOfBoundsTimedelta):
+        return _value_hashes(values.astype(object), hash_key)
+
+    ticks = values.to_numpy().view(np.uint64)
+    salt = _HASH_SALT_TIME[kind] ^ np.uint64(tz is not None)
+    hashes = pd.util.hash_array(ticks ^ salt)
+    hashes[values.isna().to_numpy()] = _MISSING_HASH
+    return hashes
+
+
+def _column_hashes(values, hash_key):
+    """Hash of each value of a Series, by value.
+
+    Equal values get the same hash whatever the dtype of their column:
+    numbers, see `_number_hashes`, datetimes and timedeltas, see
+    `_time_hashes`, categoricals through their categories, and missing
+    values all alike. Strings and other objects are hashed with `hash_key`.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, CategoricalDtype):
+        hashes = _column_hashes(pd.Series(dtype.categories), hash_key)
+        return np.append(hashes, _MISSING_HASH)[values.array.codes]
+    if _time_unit(dtype) is not None:
+        return _time_hashes(values, hash_key)
+    numpy_dtype = dtype if isinstance(dtype, np.dtype) else getattr(
+        dtype, "numpy_dtype", None
+    )
+    if numpy_dtype is not None and numpy_dtype.kind in "biuf":
+        if numpy_dtype is dtype:
+            return _number_hashes(values.to_numpy(), hash_key)
+        # nullable dtypes
+        hashes = _number_hashes(
+            values.to_numpy(numpy_dtype, na_value=0), hash_key
+        )
+        hashes[values.isna().to_numpy()] = _MISSING_HASH
+        return hashes
+    if dtype == object or is_string_dtype(dtype):
+        return _value_hashes(values, hash_key)
+    return pd.util.hash_pandas_object(
+        values, index=False, hash_key=hash_key
+    ).to_numpy()
+
+
+def _hashable_columns(df, hash_key):
+    """`df` with every column replaced by the hashes of its values, see
+    `_column_hashes`."""
+    return pd.DataFrame({
+        i: _column_hashes(df.iloc[:, i], hash_key) for i in range(df.shape[1])
+    }, index=df.index)
+
+
+def _hash_rows(df, subset=None, hash_bits=64):
+    """Hash every row of `df` into an uint64 key (or two of them).
+
+    Rows are hashed by value: equal rows get the same key whatever the
+    dtypes of their columns, so ``1``, ``1.0`` and ``True`` match, as do
+    ``-0.0`` and ``0.0``, and object values are told apart by type, see
+    `_column_hashes`.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    subset : list, optional
+        Columns used to build the key. All of them by default.
+    hash_bits : {64, 128}
+        128-bit keys add a second word hashed independently, which makes
+        a collision practically impossible.
+
+    Returns
+    -------
+    keys : numpy.ndarray
+        One uint64 per row, or an array of shape ``(n, 2)`` for 128 bits.
+    """
+    if hash_bits not in (64, 128):
+        raise ValueError(
+            "hash_bits must be 64 or 128, got {!r}".format(hash_bits)
+        )
+
+    if subset is not None:
+        df = df[subset]
+
+    cache = get_row_key_cache()
+    if cache is None:
+        return _compute_row_keys(df, hash_bits)
+
+    token, refs = cache.token(df, hash_bits)
+    keys = None if token is None else cache.get(token)
+    if keys is None:
+        keys = _compute_row_keys(df, hash_bits)
+        if token is not None:
+            keys = cache.put(token, keys, refs)
+    return keys
+
+
+def _compute_row_keys(df, hash_bits):
+    """Row keys of all the columns of `df`, see `_hash_rows`."""
+    keys = pd.util.hash_pandas_object(
+        _hashable_columns(df, _HASH_KEY_LOW), index=False
+    ).to_numpy()
+    if hash_bits == 64:
+        return keys
+
+    df = _hashable_columns(df, _HASH_KEY_HIGH)
+    salted = pd.DataFrame({
+        i: pd.util.hash_array(
+            pd.util.hash_pandas_object(
+                df.iloc[:, i], index=False, hash_key=_HASH_KEY_HIGH
+            ).to_numpy() ^ _HASH_SALT_HIGH
+        )
+        for i in range(df.shape[1])
+    }, index=df.index)
+    high = pd.util.hash_pandas_object(salted, index=False).to_numpy()
+    return np.column_stack([high, keys])
+
+
+def _factorize_keys(left_keys, right_keys):
+    """Map the keys of both sides to a shared dense code space.
+
+    Codes are given in order of first appearance.
+
+    Parameters
+    ----------
+    left_keys, right_keys : numpy.ndarray
+        One key per row, or two words per row for 128-bit keys.
+
+    Returns
+    -------
+    left_codes, right_codes : numpy.ndarray
+        Integer codes in ``[0, n_keys)``.
+    n_keys : int
+    """
+    keys = np.concatenate([left_keys, right_keys])
+    if keys.ndim == 2:
+        high, high_uniques = pd.factorize(keys[:, 0])
+        low, low_uniques = pd.factorize(keys[:, 1])
+        keys = high.astype(np.int64) * len(low_uniques) + low
+
+    codes, uniques = pd.factorize(keys)
+    n_left = len(left_keys)
+    return codes[:n_left], codes[n_left:], len(uniques)
+
+
+def _verify_codes(left_keys, right_keys, codes, n_keys):
+    """Split the hash buckets holding rows which aren't equal.
+
+    Only buckets with rows of both sides can cancel out, so a collision
+    anywhere else doesn't change the result and isn't checked. The rows of
+    those buckets are compared column-wise against the first row of their
+    bucket and the mismatching ones get new codes.
+
+    Parameters
+    ----------
+    left_keys, right_keys : pandas.DataFrame
+    codes : numpy.ndarray
+        Codes of `left_keys` followed by codes of `right_keys`, in order of
+        first appearance.
+    n_keys : int
+
+    Returns
+    -------
+    codes : numpy.ndarray
+    n_keys : int
+    """
+    n_left = len(left_keys)
+    left_counts = np.bincount(codes[:n_left], minlength=n_keys)
+    right_counts = np.bincount(codes[n_left:], minlength=n_keys)
+    shared = (left_counts > 0) & (right_counts > 0)
+
+    first = np.flatnonzero(_occurrence_rank(codes) == 0)
+    checked = np.flatnonzero(shared[codes])
+    checked = checked[checked != first[codes[checked]]]
+
+    equal = np.ones(len(checked), dtype=bool)
+    for i in range(left_keys.shape[1]):
+        values = pd.concat(
+            [left_keys.iloc[:, i], right_keys.iloc[:, i]], ignore_index=True
+        )
+        a = values.take(checked).to_numpy()
+        b = values.take(first[codes[checked]]).to_numpy()
+        equal &= (a == b) | (pd.isna(a) & pd.isna(b))
+
+    bad = checked[~equal]
+    if not len(bad):
+        return codes, n_keys
+
+    rows = pd.concat(
+        [
+            left_keys.take(bad[bad < n_left]),
+            right_keys.take(bad[bad >= n_left] - n_left),
+        ],
+        ignore_index=True,
+    )
+    rows = rows.set_axis(range(rows.shape[1]), axis=1)
+    rows[-1] = codes[bad]
+    split = rows.groupby(
+        list(rows.columns), sort=False, dropna=False
+    ).ngroup().to_numpy()
+
+    codes = codes.copy()
+    codes[bad] = n_keys + split
+    return codes, n_keys + split.max() + 1
+
+
+def _occurrence_rank(codes):
+    """Rank of every element among the previous elements with the same code.
+
+    e.g.: [7, 3, 7, 7, 3] --> [0, 0, 1, 2, 1]
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+
+    Returns
+    -------
+    rank : numpy.ndarray
+    """
+    n = len(codes)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - np.repeat(starts, sizes)
+    return rank
+
+
+def _surplus_positions(left_codes, right_codes, n_keys):
+    """Positions of the occurrences that don't cancel out.
+
+    The i-th occurrence of a key in `left` cancels the i-th occurrence of the
+    same key in `right` (FIFO), so the surplus of a key is made of its last
+    occurrences.
+
+    Parameters
+    ----------
+    left_codes, right_codes : numpy.ndarray
+        Codes as returned by `_factorize_keys`.
+    n_keys : int
+
+    Returns
+    -------
+    left_pos, right_pos : numpy.ndarray
+        Sorted positions of the rows only present in each side.
+    """
+    left_counts = np.bincount(left_codes, minlength=n_keys)
+    right_counts = np.bincount(right_codes, minlength=n_keys)
+
+    left_rank = _occurrence_rank(left_codes)
+    right_rank = _occurrence_rank(right_codes)
+
+    left_pos = np.flatnonzero(left_rank >= right_counts[left_codes])
+    right_pos = np.flatnonzero(right_rank >= left_counts[right_codes])
+    return left_pos, right_pos
+
+
+def _matched_pairs(left_codes, right_codes, n_keys):
+    """Pairs of occurrences cancelling out each other.
+
+    The i-th occurrence of a key in `left` is matched with the i-th
+    occurrence of the same key in `right`, the FIFO rule of
+    `_surplus_positions`.
+
+    Returns
+    -------
+    left_idx, right_idx : numpy.ndarray
+        Matched positions, sorted by `left_idx`.
+    """
+    right_counts = np.bincount(right_codes, minlength=n_keys)
+    left_rank = _occurrence_rank(left_codes)
+
+    left_idx = np.flatnonzero(left_rank < right_counts[left_codes])
+    right_order = np.argsort(right_codes, kind="stable")
+    right_starts = np.r_[0, np.cumsum(right_counts)[:-1]]
+    right_idx = right_order[
+        right_starts[left_codes[left_idx]] + left_rank[left_idx]
+    ]
+    return left_idx, right_idx
+
+
+def _distinct_positions(left_codes, right_codes, n_keys,
+                        return_matched=False):
+    """Positions returned by `distinct` given the codes of both sides.
+
+    Rows at the same position with the same code cancel out first, then the
+    rest cancel out in FIFO order.
+
+    Parameters
+    ----------
+    left_codes, right_codes : numpy.ndarray
+    n_keys : int
+    return_matched : bool
+        Also return the pairs of rows cancelling out each other.
+
+    Returns
+    -------
+    left_pos, right_pos : numpy.ndarray
+    matched : tuple of numpy.ndarray
+        Only if `return_matched`, see `_matched_pairs`.
+    """
+    n = min(len(left_codes), len(right_codes))
+    aligned = np.flatnonzero(left_codes[:n] == right_codes[:n])
+    return _cancel_positions(
+        left_codes, right_codes, n_keys, (aligned, aligned), return_matched
+    )
+
+
+def _cancel_positions(left_codes, right_codes, n_keys, aligned,
+                      return_matched=False):
+    """Positions of the rows left after the pairs of rows `aligned` cancel
+    out and the rest cancel out in FIFO order, see `_distinct_positions`.
+    """
+    left_keep = np.ones(len(left_codes), dtype=bool)
+    right_keep = np.ones(len(right_codes), dtype=bool)
+    left_keep[aligned[0]] = right_keep[aligned[1]] = False
+    left_keep = np.flatnonzero(left_keep)
+    right_keep = np.flatnonzero(right_keep)
+
+    left_codes, right_codes = left_codes[left_keep], right_codes[right_keep]
+    left_pos, right_pos = _surplus_positions(left_codes, right_codes, n_keys)
+    positions = left_keep[left_pos], right_keep[right_pos]
+    if not return_matched:
+        return positions
+
+    left_idx, right_idx = _matched_pairs(left_codes, right_codes, n_keys)
+    left_idx = np.r_[aligned[0], left_keep[left_idx]]
+    right_idx = np.r_[aligned[1], right_keep[right_idx]]
+    order = np.argsort(left_idx, kind="stable")
+    return positions + ((left_idx[order], right_idx[order]),)
+
+
+def _as_1d(values):
+    """Accept Series, Index and array-likes as one-dimensional input."""
+    if isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+        return values
+    return np.asarray(values)
+
+
+def _recode_categorical(left, right):
+    """Codes of two categorical Series on the union of their categories.
+
+    Non categorical pairs are returned untouched.
+
+    Parameters
+    ----------
+    left, right : pandas.Series
+
+    Returns
+    -------
+    left, right : pandas.Series
+    """
+    dtypes = (left.dtype, right.dtype)
+    if not all(isinstance(dtype, CategoricalDtype) for dtype in dtypes):
+        return left, right
+
+    left_categories = left.cat.categories
+    right_categories = right.cat.categories
+    if not left_categories.equals(right_categories):
+        categories = left_categories.union(right_categories)
+        left = left.cat.set_categories(categories)
+        right = right.cat.set_categories(categories)
+
+    # Series over the codes themselves, ``.cat.codes`` would copy them
+    return tuple(
+        pd.Series(side.array.codes, index=side.index, name=side.name,
+                  copy=False)
+        for side in (left, right)
+    )
+
+
+def _casts_exactly(values, dtype):
+    """Whether the numeric array `values` keeps every value cast to
+    `dtype`."""
+    if values.dtype == dtype or not len(values):
+        return True
+    if dtype.kind in "iu":
+        info = np.iinfo(dtype)
+        return info.min <= int(values.min()) and int(values.max()) <= info.max
+    if values.dtype.kind in "iu":
+        # large integers may round to the nearest float
+        with np.errstate(invalid="ignore"):
+            return np.array_equal(values.astype(dtype).astype(values.dtype),
+                                  values)
+    return True
+
+
+def _common_numeric(left, right):
+    """Numeric dtype both arrays cast to exactly, or object."""
+    candidates = [np.result_type(left.dtype, right.dtype)]
+    if {left.dtype.kind, right.dtype.kind} <= set("biu"):
+        candidates += [np.dtype(np.int64), np.dtype(np.uint64)]
+    for dtype in candidates:
+        if _casts_exactly(left, dtype) and _casts_exactly(right, dtype):
+            return dtype
+    return np.dtype(object)
+
+
+def _common_dtypes(left, right):
+    """Cast a pair of columns so that equal values get the same row keys.
+
+    Categorical pairs are recoded on the union of their categories, numeric
+    pairs cast to a common dtype when it holds every value exactly (``1``
+    and ``1.0`` compare equal) and to objects otherwise, numbers compared
+    with objects cast to objects, and datetimes and timedeltas cast to the
+    finer of their units.
+
+    Parameters
+    ----------
+    left, right : pandas.Series
+
+    Returns
+    -------
+    left, right : pandas.Series or None
+        None if the pair can be hashed as it is.
+    """
+    dtypes = (left.dtype, right.dtype)
+    if all(isinstance(dtype, CategoricalDtype) for dtype in dtypes):
+        return _recode_categorical(left, right)
+    if dtypes[0] == dtypes[1]:
+        return None
+    units = [_time_unit(dtype) for dtype in dtypes]
+    if None not in units:
+        return _common_unit(left, right, units)
+    if not all(isinstance(dtype, np.dtype) for dtype in dtypes):
+        return None
+
+    kinds = {dtype.kind for dtype in dtypes}
+    if kinds <= set("biuf"):
+        common = _common_numeric(left.to_numpy(), right.to_numpy())
+    elif "O" in kinds and kinds <= set("biufcO"):
+        common = np.dtype(object)
+    else:
+        return None
+    return left.astype(common), right.astype(common)
+
+
+# datetime and timedelta units, coarsest first
+_UNITS = ["s", "ms", "us", "ns"]
+
+
+def _time_unit(dtype):
+    """Unit of a datetime or timedelta dtype, or None."""
+    if isinstance(dtype, np.dtype):
+        if dtype.kind not in "mM":
+            return None
+        return np.datetime_data(dtype)[0]
+    return getattr(dtype, "unit", None)
+
+
+def _common_unit(left, right, units):
+    """Datetimes or timedeltas of a pair cast to the finer of their units,
+    see `_common_dtypes`.
+
+    Pairs of different kinds or time zones, or overflowing the finer unit,
+    are compared as objects.
+    """
+    kinds = {
+        (dtype.kind, str(getattr(dtype, "tz", None)))
+        for dtype in (left.dtype, right.dtype)
+    }
+    if len(kinds) > 1:
+        return None
+    if not set(units) <= set(_UNITS):
+        return None
+    unit = max(units, key=_UNITS.index)
+    try:
+        return left.dt.as_unit(unit), right.dt.as_unit(unit)
+    except (OverflowError, pd.errors.OutOfBoundsDatetime,
+            pd.errors.OutOfBoundsTimedelta):
+        return left.astype(object), right.astype(object)
+
+
+def _key_frames(left, right, subset=None):
+    """Columns used to compare rows, cast to common dtypes.
+
+    See `_common_dtypes`.
+
+    Parameters
+    ----------
+    left, right : pandas.DataFrame
+    subset : list, optional
+
+    Returns
+    -------
+    left_keys, right_keys : pandas.DataFrame
+    """
+    if subset is not None:
+        left, right = left[subset], right[subset]
+
+    cast = {}
+    for col in left.columns.intersection(right.columns):
+        pair = _common_dtypes(left[col], right[col])
+        if pair is not None:
+            cast[col] = pair
+    if not cast:
+        return left, right
+
+    # new frames sharing the other columns, so their buffers (and cached
+    # row keys, see `pandas_distinct.cache`) are reused
+    return tuple(
+        pd.DataFrame({
+            col: cast[col][side] if col in cast else values
+            for col, values in frame.items()
+        }, copy=False)
+        for side, frame in enumerate((left, right))
+    )
+
+
+def _distinct_values(left, right, return_matched=False):
+    """Positions of the distinct values of two one-dimensional inputs.
+
+    Parameters
+    ----------
+    left, right : pandas.Series, pandas.Index or numpy.ndarray
+    return_matched : bool
+
+    Returns
+    -------
+    left_pos, right_pos : numpy.ndarray
+    matched : tuple of numpy.ndarray
+        Only if `return_matched`.
+    """
+    left, right = pd.Series(left, copy=False), pd.Series(right, copy=False)
+    left, right = _common_dtypes(left, right) or (left, right)
+    values = pd.concat([left, right], ignore_index=True)
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    n_left = len(left)
+    return _distinct_positions(
+        codes[:n_left], codes[n_left:], len(uniques), return_matched
+    )
+
+
+def _key_index(keys):
+    """Index over row keys, a MultiIndex for 128-bit keys."""
+    if keys.ndim == 2:
+        return pd.MultiIndex.from_arrays([keys[:, 0], keys[:, 1]])
+    return pd.Index(keys)
+
+
+class _BoundedDiff:
+    """Multiset diff reading `left` in chunks against the whole `right`.
+
+    As the right keys are known in full, a left row whose rank among its
+    key reaches the count of that key in right is left only whatever comes
+    next, and every right row still unmatched needs one of the left rows
+    yet to be read. Both facts give a lower bound of the diff size that
+    grows while reading, so a diff over a threshold is detected early.
+
+    Parameters
+    ----------
+    right_keys : numpy.ndarray
+        Keys as returned by `_hash_rows`.
+    n_left : int
+        Number of left rows that will be read.
+    """
+
+    def __init__(self, right_keys, n_left):
+        codes, uniques = pd.factorize(_key_index(right_keys))
+        self._uniques = uniques
+        self._right_codes = codes
+        self._right_counts = np.bincount(codes, minlength=len(uniques))
+        self._left_counts = np.zeros(len(uniques), dtype=np.int64)
+        self._left_pos = [np.empty(0, dtype=np.int64)]
+        self._n_left = n_left
+        self._read = 0
+        self._matched = 0
+
+    def update(self, left_keys):
+        """Read the next chunk of left keys."""
+        codes = self._uniques.get_indexer(_key_index(left_keys))
+        known = np.flatnonzero(codes >= 0)
+        codes = codes[known]
+
+        rank = self._left_counts[codes] + _occurrence_rank(codes)
+        matched = known[rank < self._right_counts[codes]]
+        left_only = np.ones(len(left_keys), dtype=bool)
+        left_only[matched] = False
+
+        self._left_pos.append(self._read + np.flatnonzero(left_only))
+        self._left_counts += np.bincount(
+            codes, minlength=len(self._left_counts)
+        )
+        self._matched += len(matched)
+        self._read += len(left_keys)
+
+    @property
+    def lower_bound(self):
+        """Minimum number of distinct rows given the rows read so far."""
+        left_only = self._read - self._matched
+        right_unmatched = len(self._right_codes) - self._matched
+        left_rest = self._n_left - self._read
+        return left_only + max(0, right_unmatched - left_rest)
+
+    def positions(self):
+        """Left only rows read so far and right rows unmatched so far.
+
+        Once every left row has been read, these are the positions of the
+        multiset difference.
+        """
+        left_pos = np.concatenate(self._left_pos)
+        right_rank = _occurrence_rank(self._right_codes)
+        right_pos = np.flatnonzero(
+            right_rank >= self._left_counts[self._right_codes]
+        )
+        return left_pos, right_pos
+
+
+def _take_limited(left, right, left_pos, right_pos, limit=None,
+                  truncated=None):
+    """Take the distinct rows, the first `limit` of each side at most.
+
+    `truncated` is stored in ``attrs["truncated"]`` of both results unless
+    it's None.
+    """
+    if limit is not None:
+        left_pos, right_pos = left_pos[:limit], right_pos[:limit]
+
+    out_left = left.take(left_pos)
+    out_right = right.take(right_pos)
+
+    if truncated is not None:
+        out_left.attrs["truncated"] = truncated
+        out_right.attrs["truncated"] = truncated
+
+    return out_left, out_right
+
+
+def _distinct_counter_bounded(left_keys, right_keys, hash_bits, max_diff,
+                              chunksize):
+    """Positions of `distinct_counter` stopping past `max_diff` rows.
+
+    Returns
+    -------
+    left_pos, right_pos : numpy.ndarray
+    truncated : bool
+    """
+    bounded = _BoundedDiff(
+        _hash_rows(right_keys, hash_bits=hash_bits), len(left_keys)
+    )
+    for chunk in _chunk_slices(len(left_keys), chunksize):
+        bounded.update(
+            _hash_rows(left_keys.iloc[chunk], hash_bits=hash_bits)
+        )
+        # the diff is complete after the last chunk, however large
+        if bounded.lower_bound > max_diff and chunk.stop < len(left_keys):
+            return bounded.positions() + (True,)
+    return bounded.positions() + (False,)
+
+
+def _equal_values(left, right):
+    """Element-wise equality of two Series, missing values being equal."""
+    left = left.reset_index(drop=True)
+    right = right.reset_index(drop=True)
+    categorical = [
+        isinstance(values.dtype, CategoricalDtype) for values in (left, right)
+    ]
+    if any(categorical):
+        left, right = left.astype(object), right.astype(object)
+
+    equal = (left == right).fillna(False).to_numpy(dtype=bool)
+    return equal | (left.isna() & right.isna()).to_numpy()
+
+
+def _split_by_code(codes, n_codes):
+    """Positions of every code, in order, as a list of arrays."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.r_[0, np.cumsum(np.bincount(codes, minlength=n_codes))]
+    return [order[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _grouped_positions(left_codes, right_codes, left_groups, right_groups,
+                       n_groups, return_matched=False):
+    """`_distinct_positions` run within every group at once.
+
+    Rows of different groups never cancel out, and the i-th rows of a group
+    on both sides are aligned.
+
+    Parameters
+    ----------
+    left_codes, right_codes : numpy.ndarray
+        Codes of the rows.
+    left_groups, right_groups : numpy.ndarray
+        Codes in ``[0, n_groups)`` of the group of the rows.
+    n_groups : int
+    return_matched : bool
+
+    Returns
+    -------
+    Same as `_distinct_positions`.
+    """
+    n_codes = int(max(left_codes.max(initial=0), right_codes.max(initial=0)))
+    keys, n_keys = _compact_codes(np.r_[
+        left_groups * (n_codes + 1) + left_codes,
+        right_groups * (n_codes + 1) + right_codes,
+    ])
+    left_keys, right_keys = keys[:len(left_codes)], keys[len(left_codes):]
+
+    # the right row at the same rank in its group as each left row
+    left_rank = _occurrence_rank(left_groups)
+    right_counts = np.bincount(right_groups, minlength=n_groups)
+    right_starts = np.r_[0, np.cumsum(right_counts)[:-1]]
+    left_aligned = np.flatnonzero(left_rank < right_counts[left_groups])
+    right_aligned = np.argsort(right_groups, kind="stable")[
+        right_starts[left_groups[left_aligned]] + left_rank[left_aligned]
+    ]
+    equal = left_keys[left_aligned] == right_keys[right_aligned]
+    aligned = left_aligned[equal], right_aligned[equal]
+    return _cancel_positions(
+        left_keys, right_keys, n_keys, aligned, return_matched
+    )
+
+
+def _distinct_batch(left, right, left_groups, right_groups,
+                    left_batch=None, right_batch=None, return_matched=False):
+    """Positions of the distinct rows of a batch of groups, see
+    `distinct_by`.
+
+    The rows of the batch are taken from the compared columns `left` and
+    `right` at the positions `left_batch` and `right_batch`, unless they're
+    None, and their groups are numbered ``0..n-1`` within the batch.
+    """
+    if left_batch is not None:
+        left, right = left.take(left_batch), right.take(right_batch)
+    n_groups = int(max(left_groups.max(initial=-1),
+                       right_groups.max(initial=-1))) + 1
+    left_codes, right_codes, _ = _row_codes(left, right)
+    return _grouped_positions(
+        left_codes, right_codes, left_groups, right_groups, n_groups,
+        return_matched,
+    )
+
+
+# rows of the groups diffed by each task of `distinct_by`, and tasks per
+# worker when there're more rows
+_BATCH_ROWS = 2 ** 16
+_BATCHES_PER_WORKER = 4
+
+
+def _group_batches(left_groups, right_groups, n_groups, n_workers):
+    """Split the groups in contiguous batches of about the same number of
+    rows.
+
+    Returns
+    -------
+    batches : list of tuple
+        For each batch, the positions of its rows on each side and its
+        first group.
+    """
+    sizes = np.bincount(left_groups, minlength=n_groups)
+    sizes += np.bincount(right_groups, minlength=n_groups)
+    n_rows = max(1, int(sizes.sum()))
+    n_batches = min(
+        n_workers * _BATCHES_PER_WORKER, max(1, n_rows // _BATCH_ROWS)
+    )
+    # cut the cumulated sizes in equal parts, a large group may fill
+    # several of them
+    starts = np.cumsum(sizes) - sizes
+    _, first, batch = np.unique(
+        starts * n_batches // n_rows, return_index=True, return_inverse=True
+    )
+    return list(zip(
+        _split_by_code(batch[left_groups], len(first)),
+        _split_by_code(batch[right_groups], len(first)),
+        first,
+    ))
+
+
+def _submit_batches(executor, left, right, left_groups, right_groups,
+                    batches, return_matched):
+    """Submit `_distinct_batch` for every batch of groups to `executor`.
+
+    Threads take the rows of their batch from the shared frames, other
+    executors are sent the rows of each batch.
+
+    Returns
+    -------
+    list of concurrent.futures.Future
+    """
+    shared = isinstance(executor, ThreadPoolExecutor)
+    futures = []
+    for left_rows, right_rows, first in batches:
+        groups = (
+            left_groups[left_rows] - first, right_groups[right_rows] - first
+        )
+        if shared:
+            args = (left, right) + groups + (left_rows, right_rows)
+        else:
+            args = (left.take(left_rows), right.take(right_rows)) + groups
+        futures.append(executor.submit(
+            _distinct_batch, *args, return_matched=return_matched,
+        ))
+    return futures
+
+
+def distinct_by(left, right, by, subset=None, lazy=False,
+                return_matched=False, executor=None, progress=None):
+    """Get distinct rows diffing each group of `by` independently.
+
+    Both frames are grouped at once by factorizing the `by` columns into a
+    shared set of groups, and the groups are split in batches of about the
+    same number of rows. Each batch is diffed in `executor` by factorizing
+    its rows and cancelling them out within each group, vectorized over all
+    the groups of the batch, and the positions are gathered back, so the
+    result keeps the original order and the `by` columns label the group of
+    every row. Factorizing mostly releases the GIL, so the default thread
+    pool diffs several batches at once.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+    right : pandas.DataFrame
+    by : list
+        Group columns. Rows of different groups never cancel out.
+    subset : list
+    lazy, return_matched : bool
+        See `distinct`.
+    executor : concurrent.futures.Executor, optional
+        A thread pool by default, taking the rows of each batch in the
+        task. Other executors are sent the rows of each batch, e.g. a
+        ``ProcessPoolExecutor``.
+    progress : callable, optional
+        Called as ``progress(done, total)`` with the number of groups diffed
+        after each batch.
+
+    Returns
+    -------
+    Same as `distinct`.
+    """
+    left_groups, right_groups, n_groups = _row_codes(
+        *_key_frames(left, right, by)
+    )
+    columns = list(left.columns) if subset is None else list(subset)
+    left_keys, right_keys = _key_frames(
+        left, right, [col for col in columns if col not in by]
+    )
+    batches = _group_batches(
+        left_groups, right_groups, n_groups, os.cpu_count() or 1
+    )
+    sizes = np.diff(np.r_[[first for _, _, first in batches], n_groups])
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor()
+    try:
+        futures = _submit_batches(
+            executor, left_keys, right_keys, left_groups, right_groups,
+            batches, return_matched,
+        )
+        sizes = dict(zip(futures, sizes))
+        done = 0
+        for future in as_completed(futures):
+            done += int(sizes[future])
+            if progress is not None:
+                progress(done, n_groups)
+        results = [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    # from positions within each batch to positions within the frames
+    left_pos, right_pos, left_idx, right_idx = (
+        [np.empty(0, dtype=np.int64)] for _ in range(4)
+    )
+    for (left_rows, right_rows, _), positions in zip(batches, results):
+        left_pos.append(left_rows[positions[0]])
+        right_pos.append(right_rows[positions[1]])
+        if return_matched:
+            left_idx.append(left_rows[positions[2][0]])
+            right_idx.append(right_rows[positions[2][1]])
+
+    left_pos = np.sort(np.concatenate(left_pos))
+    right_pos = np.sort(np.concatenate(right_pos))
+    matched_pos = None
+    if return_matched:
+        left_idx = np.concatenate(left_idx)
+        right_idx = np.concatenate(right_idx)
+        order = np.argsort(left_idx, kind="stable")
+        matched_pos = left_idx[order], right_idx[order]
+
+    result = DistinctResult(left, right, left_pos, right_pos, matched_pos)
+    if lazy:
+        return result
+    return tuple(result)
+
+
+# column holding the row hashes of the dask partitions
+_DASK_HASH = "__distinct_hash__"
+
+
+def _is_dask(obj):
+    """Whether `obj` is a dask collection, without importing dask."""
+    return type(obj).__module__.split(".")[0] in ("dask", "dask_expr")
+
+
+def _with_row_hash(df, subset=None):
+    """Partition with an extra column holding its row hashes."""
+    return df.assign(**{_DASK_HASH: _hash_rows(df, subset)})
+
+
+def _distinct_partitions(left, right, side):
+    """Distinct rows of one side of a pair of co-located partitions."""
+    left_codes, right_codes, n_keys = _factorize_keys(
+        left[_DASK_HASH].to_numpy(), right[_DASK_HASH].to_numpy()
+    )
+    positions = _surplus_positions(left_codes, right_codes, n_keys)
+    frame = (left, right)[side]
+    return frame.take(positions[side]).drop(columns=_DASK_HASH)
+
+
+def distinct_dask(left, right, subset=None, npartitions=None):
+    """Get distinct rows of dask DataFrames.
+
+    Both sides are shuffled on a hash of the `subset` columns into the same
+    number of partitions, so equal rows end up in partitions with the same
+    number. Each pair of partitions is then diffed in memory as in
+    `distinct_counter`. Nothing is computed until the results are.
+
+    Requires ``dask[dataframe]``.
+
+    Parameters
+    ----------
+    left : dask.dataframe.DataFrame
+    right : dask.dataframe.DataFrame
+    subset : list
+    npartitions : int, optional
+        Partitions after the shuffle, the largest of both sides by default.
+
+    Returns
+    -------
+    left_only, right_only : dask.dataframe.DataFrame
+        Which occurrences of a repeated row are returned depends on the
+        order of the rows after the shuffle.
+    """
+    import dask.dataframe as dd
+
+    if npartitions is None:
+        npartitions = max(left.npartitions, right.npartitions)
+
+    meta = [left._meta, right._meta]
+    shuffled = [
+        df.map_partitions(
+            _with_row_hash, subset,
+            meta=df._meta.assign(**{_DASK_HASH: np.uint64(0)}),
+        ).shuffle(_DASK_HASH, npartitions=npartitions)
+        for df in (left, right)
+    ]
+    return tuple(
+        dd.map_partitions(
+            _distinct_partitions, *shuffled, side,
+            meta=meta[side], align_dataframes=False,
+        )
+        for side in (0, 1)
+    )
+
+
+def distinct_keyed(left, right, on, compare=None):
+    """Get deleted, inserted and updated rows matching them by key.
+
+    Rows are matched by factorizing the `on` columns exactly, as in
+    `distinct`, the i-th occurrence of a key in `left` with its i-th
+    occurrence in `right`. Each `compare` column
+    of the matched rows is then compared at once, and the cells that differ
+    are returned in long format.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+        Old rows.
+    right : pandas.DataFrame
+        New rows.
+    on : list
+        Key columns.
+    compare : list, optional
+        Columns to compare, all the columns of `left` but `on` by default.
+
+    Returns
+    -------
+    left_only : pandas.DataFrame
+        Rows of `left` whose key isn't in `right` (deleted).
+    right_only : pandas.DataFrame
+        Rows of `right` whose key isn't in `left` (inserted).
+    changes : pandas.DataFrame
+        One row per changed cell with the `on` columns, ``column``, and the
+        ``left`` and ``right`` values, in the order of `left`.
+
+    Examples
+    --------
+    >>> left = pd.DataFrame({"id": [1, 2, 3], "x": [10, 20, 30]})
+    >>> right = pd.DataFrame({"id": [2, 3, 4], "x": [20, 31, 40]})
+    >>> deleted, inserted, changes = distinct(left, right, on=["id"])
+    >>> changes
+       id column left right
+    0   3      x   30    31
+    """
+    on = list(on)
+    if compare is None:
+        compare = [col for col in left.columns if col not in on]
+
+    left_codes, right_codes, n_keys = _row_codes(
+        *_key_frames(left, right, on)
+    )
+    left_pos, right_pos = _surplus_positions(left_codes, right_codes, n_keys)
+    left_idx, right_idx = _matched_pairs(left_codes, right_codes, n_keys)
+
+    changes = []
+    for order, col in enumerate(compare):
+        left_values = left[col].take(left_idx)
+        right_values = right[col].take(right_idx)
+        changed = np.flatnonzero(~_equal_values(left_values, right_values))
+        keys = left[on].take(left_idx[changed]).reset_index(drop=True)
+        keys["column"] = col
+        keys["left"] = left_values.iloc[changed].to_numpy(dtype=object)
+        keys["right"] = right_values.iloc[changed].to_numpy(dtype=object)
+        keys["_order"] = left_idx[changed] * len(compare) + order
+        changes.append(keys)
+
+    columns = on + ["column", "left", "right"]
+    if changes:
+        changes = pd.concat(changes, ignore_index=True)
+        changes = changes.sort_values("_order", kind="stable")
+        changes = changes[columns].reset_index(drop=True)
+    else:
+        changes = pd.DataFrame(columns=columns)
+
+    return left.take(left_pos), right.take(right_pos), changes
+
+
+def distinct_counter(left, right, subset=None, hash_bits=64, verify=False,
+                     max_diff=None, limit=None, chunksize=100_000):
     """Get distinct rows.
 
+    Rows are counted by their hashed key, categorical columns by their codes,
+    and the surplus occurrences are taken by position from the original
+    frames, so dtypes, index and the columns outside `subset` are kept.
+
     Parameters
     ----------
     left : pandas.DataFrame
     right : pandas.DataFrame
     subset : list
+    hash_bits : {64, 128}
+        Size of the row keys. 128 bits make a false match practically
+        impossible at a small extra cost.
+    verify : bool
+        If True, rows sharing a key with rows of the other side are compared
+        column-wise, so the result is exact whatever `hash_bits` is. Not
+        supported together with `max_diff`.
+    max_diff : int, optional
+        Stop as soon as there're provably more than `max_diff` distinct
+        rows. `left` is then read in chunks of `chunksize` rows and
+        ``attrs["truncated"]`` of the results tells whether it stopped
+        early, in which case they hold the left only rows found so far and
+        the right rows not matched so far.
+    limit : int, optional
+        Return only the first `limit` distinct rows of each side.
+    chunksize : int
+        Left rows read at once when `max_diff` is given.
 
     Returns
     -------
     left_only, right_only : pandas.DataFrame
     """
+    left_keys, right_keys = _key_frames(left, right, subset)
+
+    if max_diff is not None:
+        if verify:
+            raise ValueError("verify isn't supported together with max_diff")
+        left_pos, right_pos, truncated = _distinct_counter_bounded(
+            left_keys, right_keys, hash_bits, max_diff, chunksize
+        )
+        return _take_limited(
+            left, right, left_pos, right_pos, limit, truncated
+        )
+
+    left_codes, right_codes, n_keys = _factorize_keys(
+        _hash_rows(left_keys, hash_bits=hash_bits),
+        _hash_rows(right_keys, hash_bits=hash_bits),
+    )
+    if verify:
+        codes, n_keys = _verify_codes(
+            left_keys, right_keys, np.r_[left_codes, right_codes], n_keys
+        )
+        left_codes, right_codes = codes[:len(left)], codes[len(left):]
 
-    if subset is not None:
-        left_gen = left[subset].itertuples(index=False, name="left")
-        right_gen = right[subset].itertuples(index=False, name="right")
-    else:
-        left_gen = left.itertuples(index=False, name="left")
-        right_gen = right.itertuples(index=False, name="right")
+    left_pos, right_pos = _surplus_positions(left_codes, right_codes, n_keys)
 
-    left_dict = Counter(left_gen)
-    right_dict = Counter(right_gen)
+    return _take_limited(left, right, left_pos, right_pos, limit)
 
-    _out_left = left_dict - right_dict
-    _out_right = right_dict - left_dict
 
-    out_left = pd.DataFrame(_out_left.elements(), columns=left.columns)
-    out_right = pd.DataFrame(_out_right.elements(), columns=right.columns)
+class DistinctIndex:
+    """Row keys of a reference frame, computed once to diff many frames.
 
-    return out_left, out_right
+    Hashes the rows of `reference` and keeps the sorted distinct keys, the
+    key of every row and its occurrence rank, so `diff` only hashes the
+    other frame. Rows cancel out as in `distinct_counter`: they're hashed by
+    value, so the other frames may have other dtypes, e.g. floats matching
+    the integers of the reference, and their compared columns are taken by
+    name.
+
+    The arrays are read-only after construction, so `diff` can be called
+    from several threads at once.
+
+    Parameters
+    ----------
+    reference : pandas.DataFrame
+    subset : list
+        Columns compared. All of them by default.
+
+    Examples
+    --------
+    >>> index = DistinctIndex(pd.DataFrame({"a": [1, 2, 2]}))
+    >>> other_only, reference_only = index.diff(pd.DataFrame({"a": [2, 3]}))
+    >>> other_only
+       a
+    1  3
+    >>> reference_only
+       a
+    0  1
+    2  2
+    """
+
+    def __init__(self, reference, subset=None):
+        self.reference = reference
+        self.subset = subset
+        self.columns = list(reference.columns if subset is None else subset)
+
+        keys = _hash_rows(reference, self.columns)
+        self.keys, codes, self.counts = np.unique(
+            keys, return_inverse=True, return_counts=True
+        )
+        self.codes = codes.astype(np.int64)
+        self.rank = _occurrence_rank(self.codes)
+        for arr in (self.keys, self.counts, self.codes, self.rank):
+            arr.flags.writeable = False
+
+    def __len__(self):
+        return len(self.reference)
+
+    def __repr__(self):
+        return "DistinctIndex(rows={}, keys={})".format(
+            len(self.codes), len(self.keys)
+        )
+
+    def _lookup(self, keys):
+        """Code of each key in the reference, -1 if missing."""
+        idx = np.searchsorted(self.keys, keys)
+        found = idx < len(self.keys)
+        found[found] = self.keys[idx[found]] == keys[found]
+        return np.where(found, idx, -1)
+
+    def diff(self, other, lazy=False):
+        """Get distinct rows of `other` and of the reference.
+
+        Same as ``distinct_counter(other, reference, subset)``.
+
+        Parameters
+        ----------
+        other : pandas.DataFrame
+        lazy : bool
+            If True, return a `DistinctResult`.
+
+        Returns
+        -------
+        other_only, reference_only : pandas.DataFrame
+
+        Raises
+        ------
+        ValueError
+            If `other` lacks compared columns.
+        """
+        missing = [col for col in self.columns if col not in other.columns]
+        if missing:
+            raise ValueError("columns {} are missing".format(missing))
+        keys = _hash_rows(other, self.columns)
+        codes = self._lookup(keys)
+        found = codes >= 0
+
+        # rank of each row of other among the rows with the same key
+        other_rank = _occurrence_rank(pd.factorize(keys)[0])
+        reference_counts = np.zeros(len(keys), dtype=np.int64)
+        reference_counts[found] = self.counts[codes[found]]
+        other_pos = np.flatnonzero(other_rank >= reference_counts)
+
+        other_counts = np.bincount(codes[found], minlength=len(self.keys))
+        reference_pos = np.flatnonzero(
+            self.rank >= other_counts[self.codes]
+        )
+
+        result = DistinctResult(
+            other, self.reference, other_pos, reference_pos
+        )
+        return result if lazy else tuple(result)
+
+
+class IncrementalDistinct:
+    """Distinct rows of two frames kept up to date under small changes.
+
+    Keeps the positions of the live rows of every key on each side and the
+    distinct ones, so appending or deleting rows only revisits the keys of
+    those rows. `result` gives at any time the same rows as
+    `distinct_counter` on the live rows of both sides.
+
+    Rows are identified by their position: the rows of the initial frames
+    get ``0..n-1`` and appended rows the next ones, which never change,
+    even when earlier rows are deleted.
+
+    Rows are hashed by value, see `_hash_rows`, so appended rows match
+    equal ones whatever the dtypes of their columns. They must have the
+    same columns as the initial frames.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+    right : pandas.DataFrame
+    subset : list
+        Columns compared. All of them by default.
+
+    Examples
+    --------
+    >>> inc = IncrementalDistinct(pd.DataFrame({"a": [1, 2]}),
+    ...                           pd.DataFrame({"a": [2, 3]}))
+    >>> inc.append_left(pd.DataFrame({"a": [3]}))
+    >>> inc.delete_left([0])
+    >>> left_only, right_only = inc.result()
+    >>> len(left_only), len(right_only)
+    (0, 0)
+    """
+
+    def __init__(self, left, right, subset=None):
+        self.subset = subset
+        # per side: frames appended, their first position, row keys, live
+        # positions of each key and distinct positions of each key
+        self._frames = ([], [])
+        self._starts = ([], [])
+        self._keys = [np.empty(0, dtype=np.uint64)] * 2
+        self._sizes = [0, 0]
+        self._rows = ({}, {})
+        self._only = ({}, {})
+        self._columns = list(left.columns if subset is None else subset)
+        for side, df in enumerate([left, right]):
+            self._append(side, df)
+
+    def __repr__(self):
+        left_pos, right_pos = self.positions()
+        return "IncrementalDistinct(left_only={}, right_only={})".format(
+            len(left_pos), len(right_pos)
+        )
+
+    def _key_columns(self, df):
+        """Compared columns of `df`."""
+        if self.subset is None and list(df.columns) != self._columns:
+            raise ValueError("columns {} don't match {}".format(
+                list(df.columns), self._columns
+            ))
+        return df[self._columns]
+
+    def _append(self, side, df):
+        keys = _hash_rows(self._key_columns(df))
+        start = self._sizes[side]
+        self._frames[side].append(df)
+        self._starts[side].append(start)
+        self._store_keys(side, start, keys)
+        if not len(keys):
+            return
+
+        rows = self._rows[side]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        bounds = np.flatnonzero(
+            np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        ).tolist()
+        positions = (order + start).tolist()
+        touched = sorted_keys[bounds].tolist()
+        for key, lo, hi in zip(touched, bounds, bounds[1:] + [len(keys)]):
+            rows.setdefault(key, []).extend(positions[lo:hi])
+        self._update(touched)
+
+    def _store_keys(self, side, start, keys):
+        """Write `keys` at `start`, growing the buffer geometrically."""
+        buffer = self._keys[side]
+        end = start + len(keys)
+        if end > len(buffer):
+            grown = np.empty(max(end, 2 * len(buffer)), dtype=np.uint64)
+            grown[:start] = buffer[:start]
+            buffer = self._keys[side] = grown
+        buffer[start:end] = keys
+        self._sizes[side] = end
+
+    def _delete(self, side, positions):
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        if len(positions) and not (
+            0 <= positions[0] and positions[-1] < self._sizes[side]
+        ):
+            raise IndexError("positions out of range")
+
+        rows = self._rows[side]
+        pairs = list(zip(
+            positions.tolist(), self._keys[side][positions].tolist()
+        ))
+        # check every row before deleting any
+        for pos, key in pairs:
+            live = rows.get(key, [])
+            i = bisect_left(live, pos)
+            if i == len(live) or live[i] != pos:
+                raise KeyError("row {} was already deleted".format(pos))
+        for pos, key in pairs:
+            live = rows[key]
+            del live[bisect_left(live, pos)]
+            if not live:
+                del rows[key]
+        self._update([key for _, key in pairs])
+
+    def _update(self, keys):
+        """Recompute the distinct positions of `keys`."""
+        for key in keys:
+            live = [rows.get(key, []) for rows in self._rows]
+            for side in (0, 1):
+                surplus = live[side][len(live[1 - side]):]
+                if surplus:
+                    self._only[side][key] = surplus
+                else:
+                    self._only[side].pop(key, None)
+
+    def append_left(self, df):
+        """Append the rows of `df` to `left`."""
+        self._append(0, df)
+
+    def append_right(self, df):
+        """Append the rows of `df` to `right`."""
+        self._append(1, df)
+
+    def delete_left(self, positions):
+        """Delete the rows of `left` at `positions`."""
+        self._delete(0, positions)
+
+    def delete_right(self, positions):
+        """Delete the rows of `right` at `positions`."""
+        self._delete(1, positions)
+
+    def positions(self):
+        """Sorted positions of the distinct rows of each side.
+
+        Returns
+        -------
+        left_pos, right_pos : numpy.ndarray
+        """
+        return tuple(
+            np.array(sorted(chain.from_iterable(only.values())),
+                     dtype=np.int64)
+            for only in self._only
+        )
+
+    def _take(self, side, positions):
+        starts = self._starts[side]
+        part = np.searchsorted(starts, positions, side="right") - 1
+        frames = [
+            df.take(positions[part == i] - starts[i])
+            for i, df in enumerate(self._frames[side]) if (part == i).any()
+        ]
+        if not frames:
+            return self._frames[side][0].iloc[:0]
+        return frames[0] if len(frames) == 1 else pd.concat(frames)
+
+    def result(self):
+        """Distinct rows of each side.
+
+        Returns
+        -------
+        left_only, right_only : pandas.DataFrame
+        """
+        return tuple(
+            self._take(side, pos) for side, pos in enumerate(self.positions())
+        )
+
+
+def _baseline_counts(counts, baseline):
+    """Expected count of every key given the counts of each source.
+
+    Parameters
+    ----------
+    counts : numpy.ndarray
+        Shape ``(n_keys, n_sources)``.
+    baseline : {"min", "majority"} or int
+        The count present in every source, the count reached by a strict
+        majority of sources, or the count of the given source.
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    if baseline == "min":
+        return counts.min(axis=1)
+    if baseline == "majority":
+        n_sources = counts.shape[1]
+        return -np.sort(-counts, axis=1)[:, n_sources // 2]
+    if isinstance(baseline, (int, np.integer)):
+        return counts[:, baseline]
+    raise ValueError(
+        "baseline must be 'min', 'majority' or a frame number, "
+        "got {!r}".format(baseline)
+    )
+
+
+def distinct_many(frames, subset=None, baseline="min"):
+    """Get the surplus rows of each frame relative to a baseline.
+
+    Rows of all the frames are hashed once into a joint key space and
+    counted per frame with a single `numpy.bincount` over (key, frame).
+    Rows are hashed by value, so equal rows match whatever the dtypes of
+    each frame, e.g. integers and the same floats, and the compared columns
+    are taken by name, those of the first frame by default.
+    The rows of a frame in excess of the baseline count of their key are
+    returned, the last occurrences first to be in excess as in
+    `distinct_counter`. Two frames with ``baseline="min"`` give the same
+    as `distinct_counter`.
+
+    Parameters
+    ----------
+    frames : list of pandas.DataFrame
+    subset : list
+    baseline : {"min", "majority"} or int
+        - "min": rows not present in all the frames.
+        - "majority": rows above the count reached by a strict majority of
+          the frames.
+        - int: rows above the count in ``frames[baseline]``.
+
+    Returns
+    -------
+    list of pandas.DataFrame
+        Surplus rows of each frame.
+
+    Examples
+    --------
+    >>> a = pd.DataFrame({"x": [1, 2, 3]})
+    >>> b = pd.DataFrame({"x": [1, 2]})
+    >>> c = pd.DataFrame({"x": [1, 2, 4]})
+    >>> [df.x.tolist() for df in distinct_many([a, b, c], baseline="majority")]
+    [[3], [], [4]]
+    """
+    n_sources = len(frames)
+    if subset is None and frames:
+        subset = list(frames[0].columns)
+    hashes = [_hash_rows(df, subset) for df in frames]
+    sources = np.repeat(
+        np.arange(n_sources), [len(keys) for keys in hashes]
+    )
+
+    codes, uniques = pd.factorize(
+        np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    )
+    slots = codes * n_sources + sources
+    counts = np.bincount(
+        slots, minlength=len(uniques) * n_sources
+    ).reshape(len(uniques), n_sources)
+
+    expected = _baseline_counts(counts, baseline)
+    surplus = _occurrence_rank(slots) >= expected[codes]
+
+    bounds = np.cumsum([0] + [len(keys) for keys in hashes])
+    return [
+        df.take(np.flatnonzero(surplus[start:stop]))
+        for df, start, stop in zip(frames, bounds[:-1], bounds[1:])
+    ]
+
+
+def _record_columns(obj, subset=None):
+    """Columns of a frame, a 2-D array or a structured array.
+
+    Parameters
+    ----------
+    obj : pandas.DataFrame or numpy.ndarray
+        2-D and structured arrays (including `numpy.memmap`) are read
+        without building a DataFrame.
+    subset : list, optional
+        Column labels, column numbers or field names.
+
+    Returns
+    -------
+    columns : list of numpy.ndarray
+    """
+    if isinstance(obj, pd.DataFrame):
+        if subset is None:
+            subset = obj.columns
+        return [obj[col].to_numpy() for col in subset]
+
+    if obj.dtype.names is not None:
+        if subset is None:
+            subset = obj.dtype.names
+        return [obj[name] for name in subset]
+
+    if subset is None:
+        subset = range(obj.shape[1])
+    return [obj[:, col] for col in subset]
+
+
+def _void_rows(columns, dtypes):
+    """Pack every row into one fixed-width `numpy.void` record.
+
+    Floating values are normalized so that ``-0.0`` equals ``0.0`` and all
+    NaNs share the same bytes.
+
+    Parameters
+    ----------
+    columns : list of numpy.ndarray
+    dtypes : list of numpy.dtype
+        Dtype of each field, shared by both sides.
+
+    Returns
+    -------
+    rows : numpy.ndarray
+        One-dimensional array of `numpy.void`.
+    """
+    n = len(columns[0]) if columns else 0
+    fields = [("f%d" % i, dtype) for i, dtype in enumerate(dtypes)]
+    records = np.empty(n, dtype=fields)
+
+    for (name, dtype), values in zip(fields, columns):
+        field = records[name]
+        field[...] = values
+        if dtype.kind in "fc":
+            field += 0
+            field[np.isnan(field)] = np.nan
+
+    return records.view(np.dtype((np.void, records.dtype.itemsize)))
+
+
+def _take_rows(obj, pos):
+    """Take rows by position from a pandas object or an array."""
+    if isinstance(obj, np.ndarray):
+        return np.take(obj, pos, axis=0)
+    return obj.take(pos)
+
+
+def distinct_void(left, right, subset=None):
+    """Get distinct rows of numeric data comparing raw row bytes.
+
+    Every row of `subset` is packed into a fixed-width `numpy.void` record
+    and exact multiset counts come from sorting those records, so there're
+    no hash collisions nor Python tuples involved. Columns of both sides
+    are packed with a common dtype holding all their values exactly, e.g.
+    integers and floats as floats only when the integers fit.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame or numpy.ndarray
+    right : pandas.DataFrame or numpy.ndarray
+        Numeric frames, 2-D arrays or structured arrays. `numpy.memmap`
+        inputs are read directly.
+    subset : list
+        Column labels, column numbers or field names.
+
+    Returns
+    -------
+    left_only, right_only : same type as the inputs
+        Arrays are returned as in-memory copies.
+
+    Raises
+    ------
+    TypeError
+        If columns aren't numeric, or have no common dtype holding the
+        values of both sides exactly, e.g. integers beyond 2**53 and floats.
+    """
+    left_columns = _record_columns(left, subset)
+    right_columns = _record_columns(right, subset)
+
+    dtypes = [
+        _common_numeric(left_col, right_col)
+        for left_col, right_col in zip(left_columns, right_columns)
+    ]
+    not_numeric = [dtype for dtype in dtypes if dtype.kind not in "biufcmM"]
+    if not_numeric or len(left_columns) != len(right_columns):
+        raise TypeError(
+            "distinct_void needs numeric columns on both sides with a "
+            "common dtype holding their values exactly, got {} and {}".format(
+                [col.dtype for col in left_columns],
+                [col.dtype for col in right_columns],
+            )
+        )
+
+    rows = np.concatenate([
+        _void_rows(left_columns, dtypes), _void_rows(right_columns, dtypes)
+    ])
+    uniques, codes = np.unique(rows, return_inverse=True)
+    codes = codes.reshape(-1)
+
+    n_left = len(left_columns[0]) if left_columns else 0
+    left_pos, right_pos = _surplus_positions(
+        codes[:n_left], codes[n_left:], len(uniques)
+    )
+    return _take_rows(left, left_pos), _take_rows(right, right_pos)
+
+
+# salts of the positional block checksums and of the Merkle tree nodes
+_BLOCK_SALT = np.uint64(0xBF58476D1CE4E5B9)
+_NODE_SALT = np.uint64(0x94D049BB133111EB)
+
+
+def _block_checksums(row_keys, block_size, n_blocks):
+    """Order-sensitive checksum of every block of `block_size` rows.
+
+    Missing blocks (past the end of the rows) get a zero checksum.
+    """
+    offset = (np.arange(len(row_keys)) % block_size).astype(np.uint64)
+    mixed = pd.util.hash_array(row_keys ^ (offset * _BLOCK_SALT))
+
+    checksums = np.zeros(n_blocks, dtype=np.uint64)
+    starts = np.arange(0, len(row_keys), block_size)
+    if len(starts):
+        checksums[:len(starts)] = np.add.reduceat(mixed, starts)
+    return checksums
+
+
+def _merkle_levels(checksums):
+    """Levels of the Merkle tree over the block checksums, leaves first."""
+    levels = [checksums]
+    while len(levels[-1]) > 1:
+        nodes = levels[-1]
+        if len(nodes) % 2:
+            nodes = np.r_[nodes, np.uint64(0)]
+        levels.append(pd.util.hash_array(
+            nodes[0::2] ^ pd.util.hash_array(nodes[1::2] ^ _NODE_SALT)
+        ))
+    return levels
+
+
+def _mismatching_blocks(left_levels, right_levels):
+    """Leaves that differ, descending only into differing nodes."""
+    nodes = np.zeros(1, dtype=np.int64)
+    for depth in reversed(range(len(left_levels))):
+        left_nodes, right_nodes = left_levels[depth], right_levels[depth]
+        nodes = nodes[nodes < len(left_nodes)]
+        nodes = nodes[left_nodes[nodes] != right_nodes[nodes]]
+        if depth:
+            nodes = np.sort(np.r_[2 * nodes, 2 * nodes + 1])
+    return nodes
+
+
+def _block_positions(blocks, block_size, n):
+    """Row positions of the given blocks, clipped to `n` rows."""
+    pos = (blocks[:, None] * block_size + np.arange(block_size)).ravel()
+    return pos[pos < n]
+
+
+def distinct_merkle(left, right, subset=None, block_size=4096):
+    """Get distinct rows of positionally aligned frames.
+
+    Both frames are hashed once and split in blocks of `block_size` rows.
+    A Merkle tree of block checksums is built for each side and only the
+    blocks whose checksums differ are visited. Identical blocks cancel out
+    as a whole and the rows of the differing blocks go through the
+    multiset diff together, so rows moved between those blocks still
+    cancel out. It's cheap for snapshots with few edits and the same result
+    as `distinct` on hashed rows.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+    right : pandas.DataFrame
+    subset : list
+    block_size : int
+
+    Returns
+    -------
+    left_only, right_only : pandas.DataFrame
+    """
+    left_keys, right_keys = _key_frames(left, right, subset)
+    left_hash = _hash_rows(left_keys)
+    right_hash = _hash_rows(right_keys)
+
+    n_blocks = -(-max(len(left), len(right), 1) // block_size)
+    blocks = _mismatching_blocks(
+        _merkle_levels(_block_checksums(left_hash, block_size, n_blocks)),
+        _merkle_levels(_block_checksums(right_hash, block_size, n_blocks)),
+    )
+
+    # the i-th candidates of both sides share their position, but for the
+    # tail of the longest side
+    left_cand = _block_positions(blocks, block_size, len(left))
+    right_cand = _block_positions(blocks, block_size, len(right))
+
+    left_codes, right_codes, n_keys = _factorize_keys(
+        left_hash[left_cand], right_hash[right_cand]
+    )
+    left_pos, right_pos = _distinct_positions(left_codes, right_codes, n_keys)
+
+    return left.take(left_cand[left_pos]), right.take(right_cand[right_pos])
 
 
 def distinct_merge(left, right, subset=None):
@@ -343,3 +2427,116 @@ def distinct_merge(left, right, subset=None):
     # out_righ = righ.loc[ronly.index]
 
     return lonly, ronly
+
+
+def _chunk_slices(n, chunksize):
+    """Slices splitting ``range(n)`` into chunks of `chunksize` rows."""
+    return [slice(i, i + chunksize) for i in range(0, n, chunksize)]
+
+
+async def _ahash_chunks(run, step, keys, slices, hash_bits, bounded=None,
+                        max_diff=None):
+    """Row keys of `keys` hashed chunk by chunk, see `adistinct`.
+
+    Each chunk is hashed with `run` and followed by a `step`. If `bounded`
+    is given, the chunks are fed to it too.
+
+    Returns
+    -------
+    numpy.ndarray or None
+        None if `bounded` found more than `max_diff` distinct rows before
+        the last chunk.
+    """
+    parts = []
+    for chunk in slices:
+        part = await run(_hash_rows, keys.iloc[chunk], hash_bits=hash_bits)
+        parts.append(part)
+        step()
+        if bounded is None:
+            continue
+        await run(bounded.update, part)
+        if bounded.lower_bound > max_diff and chunk.stop < len(keys):
+            return None
+    if not parts:
+        parts.append(_hash_rows(keys, hash_bits=hash_bits))
+    return np.concatenate(parts)
+
+
+async def adistinct(left, right, subset=None, hash_bits=64, chunksize=100_000,
+                    progress=None, executor=None, max_diff=None, limit=None):
+    """Get distinct rows without blocking the event loop.
+
+    Same result as `distinct` (comparing hashed rows). The heavy stages run
+    in `executor`, rows are hashed in chunks of `chunksize` and the
+    coroutine can be cancelled between any two of them.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+    right : pandas.DataFrame
+    subset : list
+    hash_bits : {64, 128}
+    chunksize : int
+        Rows hashed by each executor call.
+    progress : callable, optional
+        Called as ``progress(done, total)`` after every step.
+    executor : concurrent.futures.Executor, optional
+        The loop's default executor by default.
+    max_diff : int, optional
+        Stop hashing `left` as soon as there're provably more than
+        `max_diff` distinct rows, see `distinct_counter`.
+    limit : int, optional
+        Return only the first `limit` distinct rows of each side.
+
+    Returns
+    -------
+    left_only, right_only : pandas.DataFrame
+    """
+    loop = asyncio.get_running_loop()
+
+    def run(func, *args, **kwargs):
+        return loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+    left_keys, right_keys = await run(_key_frames, left, right, subset)
+
+    left_slices = _chunk_slices(len(left_keys), chunksize)
+    right_slices = _chunk_slices(len(right_keys), chunksize)
+    total = len(left_slices) + len(right_slices) + 2
+    done = 0
+
+    def step():
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, total)
+
+    right_hashes = await _ahash_chunks(
+        run, step, right_keys, right_slices, hash_bits
+    )
+    bounded = None
+    if max_diff is not None:
+        bounded = await run(_BoundedDiff, right_hashes, len(left_keys))
+    left_hashes = await _ahash_chunks(
+        run, step, left_keys, left_slices, hash_bits, bounded, max_diff
+    )
+    if left_hashes is None:
+        left_pos, right_pos = await run(bounded.positions)
+        return await run(
+            _take_limited, left, right, left_pos, right_pos, limit, True
+        )
+
+    right_codes, left_codes, n_keys = await run(
+        _factorize_keys, right_hashes, left_hashes
+    )
+    left_pos, right_pos = await run(
+        _distinct_positions, left_codes, right_codes, n_keys
+    )
+    step()
+
+    out_left, out_right = await run(
+        _take_limited, left, right, left_pos, right_pos, limit,
+        None if max_diff is None else False,
+    )
+    step()
+
+    return out_left, out_right
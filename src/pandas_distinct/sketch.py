@@ -0,0 +1,373 @@
+"""Sketches of row multisets.
+
+estimate_distinct
+distinct_iblt
+
+The sketches keep a fixed amount of memory whatever the size of the inputs
+and are built in one pass over the rows, chunk by chunk.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .core import _chunk_slices, _hash_rows, _occurrence_rank
+
+
+DistinctEstimate = namedtuple(
+    "DistinctEstimate", ["left_only", "right_only", "error"]
+)
+DistinctEstimate.__doc__ = """Estimated number of distinct rows.
+
+`error` is the half width of the ~95% confidence interval of both counts.
+"""
+
+
+class _BottomK:
+    """Bottom-k sample of the row keys of two sides, with their counts.
+
+    Keeps the `size` smallest row hashes seen in either side and how many
+    times each one appears in each side. As a key is sampled or not by its
+    hash, all its occurrences in both sides are kept together, so the
+    sample is a uniform sample of keys with exact counts.
+
+    Parameters
+    ----------
+    size : int
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty((0, 2), dtype=np.int64)
+
+    def update(self, hashes, side):
+        """Add the row hashes of one side (0 for left, 1 for right)."""
+        if len(self.hashes) >= self.size:
+            hashes = hashes[hashes <= self.hashes[-1]]
+        uniques, counts = np.unique(hashes, return_counts=True)
+
+        merged = np.union1d(self.hashes, uniques)[:self.size]
+        merged_counts = np.zeros((len(merged), 2), dtype=np.int64)
+
+        old = np.searchsorted(merged, self.hashes)
+        kept = old < len(merged)
+        kept[kept] = merged[old[kept]] == self.hashes[kept]
+        merged_counts[old[kept]] = self.counts[kept]
+
+        new = np.searchsorted(merged, uniques)
+        kept = new < len(merged)
+        kept[kept] = merged[new[kept]] == uniques[kept]
+        merged_counts[new[kept], side] += counts[kept]
+
+        self.hashes = merged
+        self.counts = merged_counts
+
+    def l1_difference(self):
+        """Estimate of ``sum(abs(left_count - right_count))`` over keys.
+
+        Returns
+        -------
+        estimate, std : float
+        """
+        counts = self.counts
+        rate = 1.0
+        if len(self.hashes) >= self.size:
+            # the k-th smallest hash is the sampling rate of the k-1 first
+            rate = (float(self.hashes[-1]) + 1) / 2.0 ** 64
+            counts = counts[:-1]
+
+        diff = np.abs(counts[:, 0] - counts[:, 1]).astype(float)
+        estimate = diff.sum() / rate
+        std = np.sqrt((diff ** 2).sum() * (1 - rate)) / rate
+        return float(estimate), float(std)
+
+
+def estimate_distinct(left, right, subset=None, size=1024, chunksize=100_000):
+    """Estimate how many distinct rows there're between dataframes.
+
+    Builds a bottom-k sketch of the hashed rows of both sides in one pass:
+    the `size` smallest row hashes with their count on each side, around
+    24 bytes per entry. The number of left only plus right only rows is
+    estimated from the sampled keys, and as the difference between both is
+    exactly ``len(left) - len(right)``, both counts follow.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+    right : pandas.DataFrame
+    subset : list
+    size : int
+        Number of keys kept by the sketch. The relative error shrinks as
+        ``1 / sqrt(size)``.
+    chunksize : int
+        Rows hashed at once.
+
+    Returns
+    -------
+    DistinctEstimate
+        ``(left_only, right_only, error)``, exact with ``error == 0`` when
+        there're fewer than `size` different rows.
+
+    Examples
+    --------
+    >>> left = pd.DataFrame({"a": range(100_000)})
+    >>> right = pd.DataFrame({"a": range(1_000, 101_000)})
+    >>> est = estimate_distinct(left, right)
+    >>> est.left_only - est.error <= 1_000 <= est.left_only + est.error
+    True
+    """
+    if subset is None:
+        subset = list(left.columns)
+    sketch = _BottomK(size)
+    for side, df in enumerate([left, right]):
+        for chunk in _chunk_slices(len(df), chunksize):
+            sketch.update(_hash_rows(df.iloc[chunk], subset), side)
+
+    n_diff, std = sketch.l1_difference()
+
+    # left_only + right_only == n_diff and left_only - right_only == n
+    n = len(left) - len(right)
+    n_diff = min(max(n_diff, abs(n)), len(left) + len(right))
+    return DistinctEstimate(
+        left_only=(n_diff + n) / 2,
+        right_only=(n_diff - n) / 2,
+        error=1.96 * std / 2,
+    )
+
+
+# salts deriving the cell and checksum hashes of an element
+_IBLT_SALTS = np.array([
+    0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+    0xD6E8FEB86659FD93, 0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53,
+], dtype=np.uint64)
+_IBLT_HEADER = np.array([0x49424C54, 1], dtype=np.uint64)  # "IBLT", v1
+
+
+def row_elements(df, subset=None):
+    """Element ids of the rows of `df` as a set.
+
+    The n-th occurrence of a row gets its own id, hashed from the row key
+    and n, so a multiset of rows is a set of ids and the n-th occurrences
+    of two frames get the same id.
+
+    Rows are hashed by value, so equal rows get the same id whatever the
+    dtypes of their columns, e.g. integers and the same floats. The ids
+    depend on the order of the columns, and on the way the installed
+    pandas hashes values, which ids built in other processes must share.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    subset : list
+
+    Returns
+    -------
+    elements : numpy.ndarray
+        One uint64 per row.
+    """
+    keys = _hash_rows(df, subset)
+    codes, _ = pd.factorize(keys)
+    rank = _occurrence_rank(codes)
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({"key": keys, "rank": rank}), index=False
+    ).to_numpy()
+
+
+class IBLT:
+    """Invertible Bloom lookup table of row element ids.
+
+    Each element is added to one cell of each of `n_hashes` sub-tables,
+    which keep a count, the XOR of the ids and the XOR of their checksums.
+    Subtracting the tables of two frames cancels the shared rows, and the
+    ids of the remaining ones are recovered as long as there're no more
+    than about ``size / 1.5`` of them, whatever the size of the frames.
+
+    Parameters
+    ----------
+    size : int
+        Number of cells, rounded up to a multiple of `n_hashes`. Around 1.5
+        times the expected number of distinct rows.
+    n_hashes : int
+    """
+
+    def __init__(self, size, n_hashes=3):
+        if not 1 <= n_hashes < len(_IBLT_SALTS):
+            raise ValueError(
+                "n_hashes must be between 1 and {}".format(
+                    len(_IBLT_SALTS) - 1
+                )
+            )
+        self.n_hashes = n_hashes
+        self.width = max(1, -(-int(size) // n_hashes))
+        n = self.width * n_hashes
+        self.count = np.zeros(n, dtype=np.int64)
+        self.id_sum = np.zeros(n, dtype=np.uint64)
+        self.check_sum = np.zeros(n, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.count)
+
+    def _cells(self, elements):
+        """Cell of every element in each sub-table, shape (n_hashes, n)."""
+        return np.stack([
+            j * self.width + (
+                pd.util.hash_array(elements ^ _IBLT_SALTS[j]) % self.width
+            ).astype(np.int64)
+            for j in range(self.n_hashes)
+        ])
+
+    @staticmethod
+    def _checksum(elements):
+        return pd.util.hash_array(elements ^ _IBLT_SALTS[-1])
+
+    def update(self, elements, sign=1):
+        """Add (or remove, with ``sign=-1``) element ids in place."""
+        elements = np.asarray(elements, dtype=np.uint64)
+        checksums = self._checksum(elements)
+        for cells in self._cells(elements):
+            np.add.at(self.count, cells, sign)
+            np.bitwise_xor.at(self.id_sum, cells, elements)
+            np.bitwise_xor.at(self.check_sum, cells, checksums)
+        return self
+
+    def __sub__(self, other):
+        if (len(self), self.n_hashes) != (len(other), other.n_hashes):
+            raise ValueError("can't subtract IBLTs of different shapes")
+        out = IBLT(len(self), self.n_hashes)
+        out.count = self.count - other.count
+        out.id_sum = self.id_sum ^ other.id_sum
+        out.check_sum = self.check_sum ^ other.check_sum
+        return out
+
+    def decode(self):
+        """Recover the element ids left in the table.
+
+        Peels the cells holding a single element round by round.
+
+        Returns
+        -------
+        added, removed : numpy.ndarray
+            Ids with a positive and a negative count. For ``a - b`` these
+            are the ids only in `a` and only in `b`.
+
+        Raises
+        ------
+        ValueError
+            If the table is too small for the number of elements left.
+        """
+        table = self - IBLT(len(self), self.n_hashes)  # work on a copy
+        added, removed = [], []
+        while True:
+            single = np.abs(table.count) == 1
+            single &= table._checksum(table.id_sum) == table.check_sum
+            pure = np.flatnonzero(single)
+            if not len(pure):
+                break
+            elements, first = np.unique(table.id_sum[pure], return_index=True)
+            signs = table.count[pure[first]]
+            added.append(elements[signs > 0])
+            removed.append(elements[signs < 0])
+            table.update(elements[signs > 0], sign=-1)
+            table.update(elements[signs < 0], sign=1)
+
+        if table.count.any() or table.id_sum.any():
+            raise ValueError(
+                "IBLT of {} cells can't be decoded, too many elements "
+                "left".format(len(table))
+            )
+
+        empty = [np.empty(0, dtype=np.uint64)]
+        return np.concatenate(empty + added), np.concatenate(empty + removed)
+
+    def to_bytes(self):
+        """Serialize the table."""
+        header = np.r_[_IBLT_HEADER, self.n_hashes, self.width]
+        return b"".join([
+            header.astype("<u8").tobytes(),
+            self.count.astype("<i8").tobytes(),
+            self.id_sum.astype("<u8").tobytes(),
+            self.check_sum.astype("<u8").tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a table serialized by `to_bytes`."""
+        header = np.frombuffer(data, dtype="<u8", count=4)
+        if not (header[:2] == _IBLT_HEADER).all():
+            raise ValueError("not a serialized IBLT")
+        n_hashes, width = int(header[2]), int(header[3])
+        table = cls(n_hashes * width, n_hashes)
+        n = len(table)
+        arrays = np.frombuffer(data, dtype="<u8", offset=32, count=3 * n)
+        table.count = arrays[:n].view("<i8").astype(np.int64)
+        table.id_sum = arrays[n:2 * n].astype(np.uint64)
+        table.check_sum = arrays[2 * n:].astype(np.uint64)
+        return table
+
+
+def encode_rows(df, subset=None, size=1024, n_hashes=3):
+    """Build the IBLT of the rows of `df`.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    subset : list
+    size : int
+        Cells of the table, around 1.5 times the expected number of
+        distinct rows against the other side.
+    n_hashes : int
+
+    Returns
+    -------
+    IBLT
+    """
+    return IBLT(size, n_hashes).update(row_elements(df, subset))
+
+
+def distinct_iblt(left, right, subset=None, size=1024):
+    """Get distinct rows through an IBLT set reconciliation.
+
+    Both sides are encoded into tables of `size` cells and only the
+    difference of the tables is decoded, so the decoding cost depends on
+    the number of distinct rows, not on the size of the frames. The same
+    rows as `pandas_distinct.core.distinct_counter` are returned.
+
+    When the frames live in different processes, each one sends
+    ``encode_rows(df, subset).to_bytes()`` and maps the decoded ids back
+    to its own rows with `row_elements`. Both sides must then pass the
+    same `subset`, in the same order, and run versions of pandas and
+    pandas_distinct hashing rows alike, see `row_elements`; their dtypes
+    may differ.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame
+    right : pandas.DataFrame
+    subset : list
+    size : int
+        Cells of the tables, around 1.5 times the expected number of
+        distinct rows.
+
+    Returns
+    -------
+    left_only, right_only : pandas.DataFrame
+
+    Raises
+    ------
+    ValueError
+        If there're too many distinct rows for `size`.
+    """
+    if subset is None:
+        subset = list(left.columns)
+    left_elements = row_elements(left, subset)
+    right_elements = row_elements(right, subset)
+
+    diff = IBLT(size).update(left_elements) - IBLT(size).update(
+        right_elements
+    )
+    left_only, right_only = diff.decode()
+
+    left_pos = np.flatnonzero(np.isin(left_elements, left_only))
+    right_pos = np.flatnonzero(np.isin(right_elements, right_only))
+    return left.take(left_pos), right.take(right_pos)
@@ -0,0 +1,438 @@
+"""Row hashes persisted on disk.
+
+save_snapshot
+distinct_against_snapshot
+ReferenceIndex
+
+A snapshot keeps the sorted row hashes of a frame and the position of each
+row, 12 or 16 bytes per row, so a frame can be diffed against it later
+without reading the original data again. A `ReferenceIndex` keeps only the
+sorted distinct hashes and their counts, to probe small batches against a
+large reference. Row hashes are built with
+`pandas.util.hash_pandas_object` and its fixed default key, so they're the
+same in every process. Files record a digest of the hashes of a fixed
+frame, and reading one with a pandas or pandas_distinct version hashing
+rows differently raises.
+"""
+import hashlib
+import json
+import os
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from .core import _chunk_slices, _hash_rows, _occurrence_rank
+
+_MAGIC = b"PDSNAP"
+_VERSION = 2
+_ALIGN = 64
+
+
+def _hash_scheme():
+    """Digest of the row hashes of a fixed frame of common dtypes, which
+    changes with the way rows are hashed."""
+    probe = pd.DataFrame({
+        "int": [0, 1, -2 ** 40],
+        "float": [0.5, -0.0, np.nan],
+        "bool": [True, False, True],
+        "str": ["", "a", "\u00fc"],
+        "object": pd.Series([1, "1", None], dtype=object),
+        "datetime": pd.to_datetime(["2020-01-01", "1970-01-01", None]),
+        "category": pd.Categorical(["x", "y", "x"]),
+    })
+    keys = np.ascontiguousarray(_hash_rows(probe, hash_bits=128))
+    return hashlib.blake2b(keys, digest_size=8).hexdigest()
+
+
+def _write_arrays(path, meta, arrays):
+    """Write a header with `meta` followed by the arrays, 64-byte aligned.
+
+    Parameters
+    ----------
+    path : path-like
+    meta : dict
+        JSON serializable metadata.
+    arrays : dict
+        Name to one-dimensional little-endian array.
+    """
+    meta = dict(meta, version=_VERSION, hash_scheme=_hash_scheme(),
+                pandas=pd.__version__, arrays=[
+        [name, arr.dtype.str, len(arr)] for name, arr in arrays.items()
+    ])
+    header = json.dumps(meta).encode()
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(np.uint32(len(header)).astype("<u4").tobytes())
+        f.write(header)
+        for arr in arrays.values():
+            f.write(b"\0" * (-f.tell() % _ALIGN))
+            f.write(memoryview(np.ascontiguousarray(arr)))
+
+
+def _read_arrays(path, kind):
+    """Read the metadata of a file written by `_write_arrays` and memory
+    map its arrays.
+
+    Parameters
+    ----------
+    path : path-like
+    kind : {"snapshot", "index"}
+        Expected kind of file.
+
+    Returns
+    -------
+    meta : dict
+    arrays : dict
+        Name to read-only `numpy.memmap` (or empty array).
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(_MAGIC))
+        if magic != _MAGIC:
+            raise ValueError("{} is not a snapshot".format(path))
+        size = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+        meta = json.loads(f.read(size))
+        offset = f.tell()
+
+    if meta["version"] > _VERSION:
+        raise ValueError(
+            "snapshot version {} is newer than the supported {}".format(
+                meta["version"], _VERSION
+            )
+        )
+    if meta.get("hash_scheme") != _hash_scheme():
+        raise ValueError(
+            "{} was written with pandas {} hashing rows differently, "
+            "build it again".format(path, meta.get("pandas", "unknown"))
+        )
+    # files of the first version were all snapshots
+    found = meta.get("kind", "snapshot")
+    if found != kind:
+        raise ValueError("{} has kind {!r}, expected {!r}".format(
+            path, found, kind
+        ))
+
+    arrays = {}
+    for name, dtype, n in meta.pop("arrays"):
+        dtype = np.dtype(dtype)
+        offset += -offset % _ALIGN
+        if n:
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode="r", offset=offset, shape=(n,)
+            )
+        else:
+            arrays[name] = np.empty(0, dtype=dtype)
+        offset += n * dtype.itemsize
+    return meta, arrays
+
+
+def _key_counts(uniques, counts, keys):
+    """Count of each of `keys` among the sorted `uniques`, 0 if missing."""
+    if not len(uniques):
+        return np.zeros(len(keys), dtype=np.int64)
+    idx = np.searchsorted(uniques, keys).clip(max=len(uniques) - 1)
+    return np.where(uniques[idx] == keys, counts[idx], 0)
+
+
+def _frame_meta(df, subset):
+    """Columns and dtypes the row hashes of `df` depend on."""
+    columns = list(df.columns if subset is None else subset)
+    return {
+        "columns": [str(col) for col in columns],
+        "dtypes": [str(df[col].dtype) for col in columns],
+    }
+
+
+def _check_meta(meta, df):
+    """Raise if `df` wouldn't hash like the frame a file was built from.
+
+    Returns
+    -------
+    subset : list
+    """
+    columns = {str(col): col for col in df.columns}
+    missing = [col for col in meta["columns"] if col not in columns]
+    if missing:
+        raise ValueError("columns {} are missing".format(missing))
+    subset = [columns[col] for col in meta["columns"]]
+
+    found = _frame_meta(df, subset)["dtypes"]
+    if found != meta["dtypes"]:
+        raise ValueError(
+            "dtypes {} don't match the snapshot ones {}, rows would "
+            "hash differently".format(found, meta["dtypes"])
+        )
+    return subset
+
+
+def save_snapshot(df, path, subset=None):
+    """Save the row hashes of `df` to diff other frames against it later.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    path : path-like
+    subset : list
+        Columns hashed. All of them by default.
+
+    See Also
+    --------
+    distinct_against_snapshot
+    """
+    keys = _hash_rows(df, subset)
+    order = np.argsort(keys, kind="stable")
+    pos_dtype = "<u4" if len(df) < 2 ** 32 else "<u8"
+    meta = dict(_frame_meta(df, subset), kind="snapshot")
+    _write_arrays(path, meta, {
+        "keys": keys[order].astype("<u8"),
+        "positions": order.astype(pos_dtype),
+    })
+
+
+def distinct_against_snapshot(df, path, chunksize=1_000_000):
+    """Get the distinct rows of `df` and of a snapshot.
+
+    The snapshot is memory-mapped and merged with the sorted row hashes of
+    `df`, `chunksize` entries at a time, so only `df` and a chunk of the
+    snapshot are in memory. Rows cancel out as in
+    `pandas_distinct.core.distinct_counter`.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Compared on the columns of the snapshot, which must have the same
+        dtypes.
+    path : path-like
+        Written by `save_snapshot`.
+    chunksize : int
+        Snapshot entries read at once.
+
+    Returns
+    -------
+    left_only : pandas.DataFrame
+        Rows of `df` not in the snapshot.
+    right_only : numpy.ndarray
+        Sorted positions, in the saved frame, of its rows not in `df`.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> import pandas as pd
+    >>> path = os.path.join(tempfile.mkdtemp(), "yesterday.snap")
+    >>> save_snapshot(pd.DataFrame({"a": [1, 2, 3]}), path)
+    >>> left_only, right_only = distinct_against_snapshot(
+    ...     pd.DataFrame({"a": [2, 3, 4]}), path
+    ... )
+    >>> left_only
+       a
+    2  4
+    >>> right_only
+    array([0])
+    """
+    meta, arrays = _read_arrays(path, "snapshot")
+    subset = _check_meta(meta, df)
+    snap_keys, snap_pos = arrays["keys"], arrays["positions"]
+
+    keys = _hash_rows(df, subset)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    uniques, first, counts = np.unique(
+        sorted_keys, return_index=True, return_counts=True
+    )
+
+    # rows of df beyond the occurrences of their key in the snapshot
+    lo = np.searchsorted(snap_keys, uniques, side="left")
+    snap_counts = np.searchsorted(snap_keys, uniques, side="right") - lo
+    code = np.repeat(np.arange(len(uniques)), counts)
+    rank = np.arange(len(keys)) - first[code]
+    left_pos = np.sort(order[rank >= snap_counts[code]])
+
+    # snapshot rows beyond the occurrences of their key in df
+    right_pos = []
+    run_key, run_start = None, 0
+    for chunk in _chunk_slices(len(snap_keys), chunksize):
+        chunk_keys = np.asarray(snap_keys[chunk])
+        starts = np.r_[True, chunk_keys[1:] != chunk_keys[:-1]]
+        start = np.maximum.accumulate(
+            np.where(starts, np.arange(len(chunk_keys)), 0)
+        ) + chunk.start
+        if chunk_keys[0] == run_key:
+            # the first run goes on from the previous chunk
+            start[start == chunk.start] = run_start
+        run_key, run_start = chunk_keys[-1], start[-1]
+
+        df_counts = _key_counts(uniques, counts, chunk_keys)
+        rank = chunk.start + np.arange(len(chunk_keys)) - start
+        right_pos.append(np.asarray(snap_pos[chunk])[rank >= df_counts])
+
+    right_pos = np.sort(
+        np.concatenate([np.empty(0, dtype=np.int64)] + right_pos)
+        .astype(np.int64)
+    )
+    return df.take(left_pos), right_pos
+
+
+def _merge_counts(left, right):
+    """Merge two sorted ``(uniques, counts)`` runs, summing the counts of
+    equal keys."""
+    keys = np.concatenate([left[0], right[0]])
+    # timsort finds the two sorted runs and merges them in linear time
+    order = np.argsort(keys, kind="stable")
+    keys, counts = keys[order], np.concatenate([left[1], right[1]])[order]
+    if not len(keys):
+        return keys, counts
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+def _parquet_chunks(path, columns, chunksize):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(
+        batch_size=chunksize, columns=columns
+    ):
+        yield batch.to_pandas()
+
+
+class ReferenceIndex:
+    """Counts of the rows of a reference table, memory-mapped from disk.
+
+    Holds the sorted distinct row hashes of the reference and how many
+    times each one appears. Probing a batch costs
+    ``O(len(batch) * log(n_keys))`` reads of the file, served by the page
+    cache, and nothing of the reference is loaded in memory. Use `build`
+    to create one.
+
+    Parameters
+    ----------
+    path : path-like
+        Written by `ReferenceIndex.build`.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "reference.idx")
+    >>> index = ReferenceIndex.build(pd.DataFrame({"a": [1, 2, 2]}), path)
+    >>> index.anti_join(pd.DataFrame({"a": [2, 2, 2, 3]}))
+       a
+    2  2
+    3  3
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.meta, arrays = _read_arrays(path, "index")
+        self.keys, self.counts = arrays["keys"], arrays["counts"]
+
+    def __len__(self):
+        """Number of rows of the reference."""
+        return self.meta["n_rows"]
+
+    @classmethod
+    def build(cls, source, path, subset=None, chunksize=1_000_000):
+        """Hash the rows of `source` and write their counts to `path`.
+
+        Chunks are hashed and counted one by one, so memory depends on the
+        number of different rows, not on the size of `source`.
+
+        Parameters
+        ----------
+        source : pandas.DataFrame, path-like or iterable of DataFrames
+            A Parquet file is read `chunksize` rows at a time, which needs
+            ``pyarrow``.
+        path : path-like
+        subset : list
+            Columns hashed. All of them by default.
+        chunksize : int
+
+        Returns
+        -------
+        ReferenceIndex
+
+        Raises
+        ------
+        ValueError
+            If an iterable `source` yields no DataFrame, as the columns and
+            dtypes to record are taken from the first one.
+        """
+        if isinstance(source, pd.DataFrame):
+            chunks = (source.iloc[chunk] for chunk in _chunk_slices(
+                len(source), chunksize
+            ))
+            meta = _frame_meta(source, subset)
+        else:
+            if isinstance(source, (str, os.PathLike)):
+                source = _parquet_chunks(source, subset, chunksize)
+            chunks = iter(source)
+            first = next(chunks, None)
+            if first is None:
+                raise ValueError("source yields no DataFrame")
+            meta = _frame_meta(first, subset)
+            chunks = chain([first], chunks)
+
+        # sorted runs of decreasing size, a run is merged into the previous
+        # one as soon as it's as large, so every key is merged
+        # O(log(n_chunks)) times
+        runs = []
+        n_rows = 0
+        for chunk in chunks:
+            run = np.unique(_hash_rows(chunk, subset), return_counts=True)
+            n_rows += len(chunk)
+            while runs and len(runs[-1][0]) <= len(run[0]):
+                run = _merge_counts(runs.pop(), run)
+            runs.append(run)
+        keys = np.empty(0, dtype=np.uint64)
+        counts = np.empty(0, dtype=np.int64)
+        for run in reversed(runs):
+            keys, counts = _merge_counts(run, (keys, counts))
+
+        count_dtype = "<u4" if counts.max(initial=0) < 2 ** 32 else "<u8"
+        meta = dict(meta, kind="index", n_rows=n_rows)
+        _write_arrays(path, meta, {
+            "keys": keys.astype("<u8"),
+            "counts": counts.astype(count_dtype),
+        })
+        return cls(path)
+
+    def _probe(self, keys):
+        """Count in the reference of each row hash."""
+        idx = np.searchsorted(self.keys, keys)
+        found = idx < len(self.keys)
+        found[found] = self.keys[idx[found]] == keys[found]
+        counts = np.zeros(len(keys), dtype=np.int64)
+        counts[found] = self.counts[idx[found]]
+        return counts
+
+    def count(self, df):
+        """Occurrences in the reference of each row of `df`.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Compared on the columns of the reference, which must have the
+            same dtypes.
+
+        Returns
+        -------
+        counts : numpy.ndarray
+        """
+        return self._probe(_hash_rows(df, _check_meta(self.meta, df)))
+
+    def anti_join(self, batch):
+        """Rows of `batch` not cancelled out by rows of the reference.
+
+        The n-th occurrence of a row in `batch` is kept when the reference
+        has fewer than n occurrences of it, as the left only rows of
+        `pandas_distinct.core.distinct_counter`.
+
+        Parameters
+        ----------
+        batch : pandas.DataFrame
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        keys = _hash_rows(batch, _check_meta(self.meta, batch))
+        codes, _ = pd.factorize(keys)
+        return batch[_occurrence_rank(codes) >= self._probe(keys)]
@@ -0,0 +1,486 @@
+"""Distinct implementations running in SQL engines.
+
+distinct_duckdb
+distinct_sql
+distinct_query
+
+The multiset difference is written in SQL: occurrences of every row are
+numbered with ``row_number() OVER (PARTITION BY ...)`` and the i-th
+occurrence of a row in one side cancels out the i-th one in the other side,
+the same FIFO rule as `pandas_distinct.core`.
+
+`distinct_sql` streams the results of two queries instead, keeping only the
+rows not cancelled out yet, and `distinct_query` runs the whole difference
+in the database holding both tables.
+"""
+import os
+import re
+from collections import deque
+from itertools import zip_longest
+
+import numpy as np
+import pandas as pd
+
+from .core import DistinctResult
+
+# internal column names, unlikely to clash with the user ones
+_POS = "__distinct_pos__"
+_RANK = "__distinct_rank__"
+
+# null-safe equality of each dialect
+_NULL_EQ = {
+    "duckdb": "IS NOT DISTINCT FROM",
+    "postgresql": "IS NOT DISTINCT FROM",
+    "sqlite": "IS",
+}
+
+
+def _quote(name):
+    """Quote an SQL identifier."""
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+
+def _literal(value):
+    """Quote an SQL string literal."""
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def _diff_query(left, right, columns, dialect="duckdb", aligned=False,
+                select=None):
+    """SQL selecting the rows of `left` not cancelled out by `right`.
+
+    Parameters
+    ----------
+    left, right : str
+        SQL sources (table names or parenthesized queries) exposing
+        `columns`, and a position column if `aligned`.
+    columns : list of str
+        Columns compared, quoted.
+    dialect : {"duckdb", "postgresql", "sqlite"}
+    aligned : bool
+        Cancel out first the rows at the same position with the same
+        values, as the loop of `pandas_distinct.core.distinct`, and number
+        the occurrences in position order.
+    select : str, optional
+        Select list over the remaining rows of `left` (aliased ``l``), its
+        position by default.
+
+    Returns
+    -------
+    str
+    """
+    eq = _NULL_EQ[dialect]
+
+    def same_row(a, b):
+        return " AND ".join(
+            "{a}.{c} {eq} {b}.{c}".format(a=a, b=b, c=c, eq=eq)
+            for c in columns
+        )
+
+    partition = ", ".join(columns)
+    order = "ORDER BY {}".format(_POS) if aligned else ""
+    numbered = (
+        "SELECT *, row_number() OVER (PARTITION BY {partition} {order}) "
+        "AS {rank} FROM {src}{where}"
+    )
+    where = ""
+    if aligned:
+        where = (
+            " AS s WHERE NOT EXISTS (SELECT 1 FROM {other} AS o "
+            "WHERE o.{pos} = s.{pos} AND {same})"
+        )
+
+    def side(src, other):
+        return numbered.format(
+            partition=partition, order=order, rank=_RANK, src=src,
+            where=where.format(
+                other=other, pos=_POS, same=same_row("o", "s")
+            ),
+        )
+
+    if select is None:
+        select = "l.{}".format(_POS)
+    # CTE names not clashing with the tables of the user
+    return (
+        "WITH __distinct_lsrc__ AS (SELECT * FROM {left}), "
+        "__distinct_rsrc__ AS (SELECT * FROM {right}), "
+        "__distinct_l__ AS ({l_side}), __distinct_r__ AS ({r_side}) "
+        "SELECT {select} FROM __distinct_l__ AS l "
+        "LEFT JOIN __distinct_r__ AS r "
+        "ON {same} AND l.{rank} = r.{rank} "
+        "WHERE r.{rank} IS NULL {order_by}"
+    ).format(
+        left=left, right=right,
+        l_side=side("__distinct_lsrc__", "__distinct_rsrc__"),
+        r_side=side("__distinct_rsrc__", "__distinct_lsrc__"),
+        select=select, same=same_row("l", "r"), rank=_RANK,
+        order_by="ORDER BY l.{}".format(_POS) if aligned else "",
+    )
+
+
+def _is_path(obj):
+    return isinstance(obj, (str, os.PathLike))
+
+
+def _duckdb_source(con, name, obj, subset):
+    """Register `obj` in `con` as `name` with positional and key columns.
+
+    Returns
+    -------
+    columns : list of str
+        Quoted key columns.
+    """
+    if _is_path(obj):
+        scan = "read_parquet({}, file_row_number = true)".format(
+            _literal(os.fspath(obj))
+        )
+        if subset is None:
+            schema = con.execute("DESCRIBE SELECT * FROM " + scan).fetchall()
+            subset = [
+                row[0] for row in schema if row[0] != "file_row_number"
+            ]
+        keys = ", ".join(
+            "{} AS c{}".format(_quote(col), i) for i, col in enumerate(subset)
+        )
+        con.execute(
+            "CREATE TEMP VIEW {} AS SELECT file_row_number AS {}, {} "
+            "FROM {}".format(name, _POS, keys, scan)
+        )
+    else:
+        if subset is None:
+            subset = obj.columns
+        # shares the numpy buffers of the columns
+        keys = pd.DataFrame(
+            {"c{}".format(i): obj[col].to_numpy()
+             for i, col in enumerate(subset)},
+            copy=False,
+        )
+        keys[_POS] = np.arange(len(obj))
+        con.register(name, keys)
+
+    return ["c{}".format(i) for i in range(len(subset))]
+
+
+def _duckdb_rows(con, obj, positions):
+    """Rows of `obj` at `positions`, read back from Parquet if needed."""
+    if not _is_path(obj):
+        return obj.take(positions)
+
+    con.register("__distinct_take__", pd.DataFrame({_POS: positions}))
+    out = con.execute(
+        "SELECT * FROM read_parquet({}, file_row_number = true) "
+        "WHERE file_row_number IN (SELECT {} FROM __distinct_take__) "
+        "ORDER BY file_row_number".format(_literal(os.fspath(obj)), _POS)
+    ).df()
+    con.unregister("__distinct_take__")
+    return out.set_index("file_row_number").rename_axis(None)
+
+
+def distinct_duckdb(left, right, subset=None, lazy=False, connection=None):
+    """Get distinct rows running the difference in DuckDB.
+
+    The key columns of frames are registered in DuckDB as a new frame
+    sharing their numpy buffers (other dtypes are converted to numpy),
+    Parquet files are read directly, and the query runs multi-threaded and
+    spills to disk when needed. The positions of the distinct rows come
+    back from DuckDB and the rows are taken from the inputs.
+
+    The result is the same as `pandas_distinct.core.distinct`, missing
+    values being equal in both, when the compared columns have the same
+    dtypes on both sides. Other pairs are compared with the casting rules
+    of DuckDB.
+
+    Requires ``duckdb``.
+
+    Parameters
+    ----------
+    left : pandas.DataFrame or path-like
+    right : pandas.DataFrame or path-like
+        Parquet files are read with DuckDB, their distinct rows are indexed
+        by row number.
+    subset : list
+    lazy : bool
+        If True, return a `DistinctResult` (frames only).
+    connection : duckdb.DuckDBPyConnection, optional
+        A new in-memory database by default.
+
+    Returns
+    -------
+    left_only, right_only : pandas.DataFrame
+    """
+    import duckdb
+
+    if lazy and (_is_path(left) or _is_path(right)):
+        raise ValueError("lazy results need DataFrame inputs")
+
+    con = connection if connection is not None else duckdb.connect()
+    try:
+        columns = _duckdb_source(con, "__distinct_left__", left, subset)
+        _duckdb_source(con, "__distinct_right__", right, subset)
+
+        positions = [
+            con.execute(
+                _diff_query(a, b, columns, "duckdb", aligned=True)
+            ).fetchnumpy()[_POS].astype(np.int64)
+            for a, b in [
+                ("__distinct_left__", "__distinct_right__"),
+                ("__distinct_right__", "__distinct_left__"),
+            ]
+        ]
+
+        if lazy:
+            return DistinctResult(left, right, *positions)
+        return tuple(
+            _duckdb_rows(con, obj, pos)
+            for obj, pos in zip((left, right), positions)
+        )
+    finally:
+        for name in ("__distinct_left__", "__distinct_right__"):
+            con.execute("DROP VIEW IF EXISTS " + name)
+        if connection is None:
+            con.close()
+
+
+def _cursor(obj):
+    """Cursor of a DB-API connection, or `obj` if it's a cursor already.
+
+    Returns
+    -------
+    cursor, owned : object, bool
+        `owned` is True if the cursor was opened here.
+    """
+    if hasattr(obj, "fetchmany"):
+        return obj, False
+    return obj.cursor(), True
+
+
+def _fetch_rows(cursor, batch_size):
+    """Yield the rows of `cursor`, fetched `batch_size` at a time."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _row_key(columns, subset):
+    """Function taking the compared values out of a fetched row."""
+    if subset is None:
+        return tuple
+    idx = [columns.index(col) for col in subset]
+    return lambda row: tuple(row[i] for i in idx)
+
+
+def _update_pending(pos, key, row, same, opposite):
+    """Cancel out the oldest pending row of `key` in `opposite`, or keep
+    the row pending in `same`. Emptied keys are dropped.
+    """
+    pending = opposite.get(key)
+    if pending:
+        pending.popleft()  # FIFO
+        if not pending:
+            del opposite[key]
+    else:
+        same.setdefault(key, deque()).append((pos, row))
+
+
+def _pending_frame(pending, columns):
+    """DataFrame of the pending rows indexed by their position."""
+    rows = sorted(
+        (row for rows in pending.values() for row in rows),
+        key=lambda item: item[0],
+    )
+    return pd.DataFrame.from_records(
+        [row for _, row in rows],
+        columns=columns,
+        index=pd.Index([pos for pos, _ in rows], dtype=np.int64),
+    )
+
+
+def distinct_sql(conn_a, query_a, conn_b, query_b, subset=None,
+                 batch_size=10_000):
+    """Get distinct rows between the results of two SQL queries.
+
+    Both results are fetched in lockstep, `batch_size` rows at a time, and
+    each row is looked up by its values in a dict of the rows of the other
+    side not cancelled out yet. A row is kept in memory until its match on
+    the other side is fetched, so memory depends on the number of distinct
+    rows only when both queries return the rows in the same order, e.g.
+    with the same ORDER BY on the compared columns. Otherwise up to half of
+    the rows of each result may be pending at once, on top of the distinct
+    ones. The rows returned are the same as reading both results with
+    `pandas.read_sql` and calling `pandas_distinct.core.distinct`.
+
+    Parameters
+    ----------
+    conn_a, conn_b : DB-API connection or cursor
+        A new cursor is opened on connections. Pass a cursor to use a
+        server-side one, e.g. ``conn.cursor(name="diff")`` with psycopg2,
+        otherwise the driver may fetch the whole result on execute.
+    query_a, query_b : str
+    subset : list
+        Columns of the results compared. All of them by default.
+    batch_size : int
+        Rows fetched at once from each side.
+
+    Returns
+    -------
+    left_only, right_only : pandas.DataFrame
+        Indexed by the row number in the query result.
+
+    Examples
+    --------
+    >>> import sqlite3
+    >>> con = sqlite3.connect(":memory:")
+    >>> left, right = distinct_sql(
+    ...     con, "SELECT 1 AS a UNION ALL SELECT 2",
+    ...     con, "SELECT 2 AS a",
+    ... )
+    >>> left
+       a
+    0  1
+    """
+    left_cursor, left_owned = _cursor(conn_a)
+    right_cursor, right_owned = _cursor(conn_b)
+    try:
+        left_cursor.execute(query_a)
+        right_cursor.execute(query_b)
+        left_columns = [col[0] for col in left_cursor.description]
+        right_columns = [col[0] for col in right_cursor.description]
+
+        left_key = _row_key(left_columns, subset)
+        right_key = _row_key(right_columns, subset)
+
+        left_pending, right_pending = {}, {}
+        rows = zip_longest(
+            _fetch_rows(left_cursor, batch_size),
+            _fetch_rows(right_cursor, batch_size),
+        )
+        for i, (left_row, right_row) in enumerate(rows):
+            lkey = None if left_row is None else left_key(left_row)
+            rkey = None if right_row is None else right_key(right_row)
+
+            # if both rows are equal, they cancel out
+            if lkey is not None and lkey == rkey:
+                continue
+            if rkey is not None:
+                _update_pending(i, rkey, right_row, right_pending,
+                                left_pending)
+            if lkey is not None:
+                _update_pending(i, lkey, left_row, left_pending,
+                                right_pending)
+    finally:
+        if left_owned:
+            left_cursor.close()
+        if right_owned:
+            right_cursor.close()
+
+    return (
+        _pending_frame(left_pending, left_columns),
+        _pending_frame(right_pending, right_columns),
+    )
+
+
+# dialects by the top-level module of the connection class
+_DIALECTS = {
+    "sqlite3": "sqlite",
+    "duckdb": "duckdb",
+    "_duckdb": "duckdb",
+    "psycopg": "postgresql",
+    "psycopg2": "postgresql",
+}
+
+
+def _dialect(connection):
+    module = type(connection).__module__.split(".")[0]
+    try:
+        return _DIALECTS[module]
+    except KeyError:
+        raise ValueError(
+            "unknown dialect of {!r}, pass dialect=".format(connection)
+        ) from None
+
+
+def _sql_source(source, alias):
+    """Table name or query usable in a FROM clause."""
+    if re.match(r"\s*(select|with|values)\b", source, re.I):
+        return "({}) AS {}".format(source, alias)
+    return source
+
+
+def _fetch_frame(cursor, query):
+    cursor.execute(query)
+    columns = [col[0] for col in cursor.description]
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+
+def distinct_query(connection, left, right, subset=None, dialect=None):
+    """Get distinct rows of two tables of the same database.
+
+    The multiset difference runs in the database and only the distinct
+    rows are fetched: ``EXCEPT ALL`` when all the columns are compared and
+    the database supports it (PostgreSQL, DuckDB), a ``row_number()``
+    anti-join otherwise (SQLite, or a `subset`). The rows are the same as
+    `pandas_distinct.core.distinct` up to which duplicate is returned, and
+    tables have no row order, so they're indexed from 0.
+
+    Parameters
+    ----------
+    connection : DB-API connection
+    left, right : str
+        Table names or ``SELECT`` queries.
+    subset : list
+        Columns compared. All of them by default.
+    dialect : {"sqlite", "postgresql", "duckdb"}, optional
+        Guessed from the connection by default.
+
+    Returns
+    -------
+    left_only, right_only : pandas.DataFrame
+
+    Examples
+    --------
+    >>> import sqlite3
+    >>> con = sqlite3.connect(":memory:")
+    >>> left, right = distinct_query(
+    ...     con, "SELECT 1 AS a UNION ALL SELECT 2", "SELECT 2 AS a"
+    ... )
+    >>> left
+       a
+    0  1
+    """
+    if dialect is None:
+        dialect = _dialect(connection)
+    if dialect not in _NULL_EQ:
+        raise ValueError(
+            "dialect must be one of {}, got {!r}".format(
+                sorted(_NULL_EQ), dialect
+            )
+        )
+
+    sources = _sql_source(left, "l_query"), _sql_source(right, "r_query")
+    cursor = connection.cursor()
+    try:
+        if subset is None and dialect != "sqlite":
+            return tuple(
+                _fetch_frame(
+                    cursor, "SELECT * FROM {} EXCEPT ALL SELECT * FROM {}"
+                    .format(a, b)
+                )
+                for a, b in [sources, sources[::-1]]
+            )
+
+        out = []
+        for a, b in [sources, sources[::-1]]:
+            cursor.execute("SELECT * FROM {} LIMIT 0".format(a))
+            columns = [_quote(col[0]) for col in cursor.description]
+            keys = columns if subset is None else [_quote(c) for c in subset]
+            select = ", ".join("l." + col for col in columns)
+            out.append(
+                _fetch_frame(
+                    cursor, _diff_query(a, b, keys, dialect, select=select)
+                )
+            )
+        return tuple(out)
+    finally:
+        cursor.close()
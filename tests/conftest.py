@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def random_frames():
+    """Build a pair of frames of random integers ``a`` and ``b`` and a
+    string column ``c``, from ``a`` on the left and ``b`` on the right."""
+    def build(seed, n_left, n_right, high=5):
+        rng = np.random.default_rng(seed)
+        left = pd.DataFrame(
+            rng.integers(0, high, (n_left, 2)), columns=["a", "b"]
+        )
+        right = pd.DataFrame(
+            rng.integers(0, high, (n_right, 2)), columns=["a", "b"]
+        )
+        left["c"] = left["a"].astype(str)
+        right["c"] = right["b"].astype(str)
+        return left, right
+
+    return build
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas_distinct import core
+from pandas_distinct.cache import DiskCache, RowKeyCache, get_row_key_cache
+
+
+@pytest.fixture
+def frame(random_frames):
+    df, _ = random_frames(11, 500, 0)
+    df = df.rename(columns={"c": "s"})
+    df["c"] = df["b"].astype("category")
+    return df
+
+
+@pytest.mark.parametrize("subset", [["a"], ["a", "b"], ["s"], ["c"], None])
+def test_row_key_cache_hit(frame, subset):
+
+    with RowKeyCache() as cache:
+        first = core._hash_rows(frame, subset)
+        second = core._hash_rows(frame[list(frame.columns)], subset)
+
+    assert cache.info().hits == 1
+    assert not second.flags.writeable
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first, core._hash_rows(frame, subset))
+
+
+def test_row_key_cache_install(frame):
+
+    with RowKeyCache() as cache:
+        assert get_row_key_cache() is cache
+        left, right = core.distinct_counter(frame, frame.iloc[:300])
+        again = core.distinct_counter(frame, frame.iloc[:200])
+
+    assert get_row_key_cache() is None
+    assert cache.info().hits >= 1
+    assert len(left) == 200 and len(right) == 0
+    assert len(again[0]) == 300
+
+
+def test_row_key_cache_invalidation(frame):
+
+    with RowKeyCache() as cache:
+        core._hash_rows(frame, ["a"])
+        frame["a"] = frame["a"] + 1
+        keys = core._hash_rows(frame, ["a"])
+
+    assert cache.info().hits == 0
+    np.testing.assert_array_equal(keys, core._hash_rows(frame, ["a"]))
+
+
+@pytest.mark.parametrize("column", ["a", "c"])
+def test_row_key_cache_written_in_place(frame, column):
+
+    left = frame[[column]].copy()
+    right = left.copy()
+    with RowKeyCache() as cache:
+        assert core.distinct_counter(left, right)[1].empty
+        left.loc[0, column] = 4 if left.loc[0, column] != 4 else 0
+        out_left, out_right = core.distinct_counter(left, right)
+
+    expected = core.distinct_counter(left, right)
+    assert cache.info().hits == 1  # only right
+    pd.testing.assert_frame_equal(out_left, expected[0])
+    pd.testing.assert_frame_equal(out_right, expected[1])
+    assert len(out_left) == len(out_right) == 1
+
+
+def test_row_key_cache_freed_buffer():
+
+    cache = RowKeyCache()
+    with cache:
+        for i in range(5):
+            df = pd.DataFrame({"a": np.full(1000, i)})
+            keys = core._hash_rows(df)
+            np.testing.assert_array_equal(
+                keys, core._hash_rows(pd.DataFrame({"a": np.full(1000, i)}))
+            )
+            del df
+
+    assert len(cache) <= 2
+
+
+def test_row_key_cache_eviction(frame):
+
+    cache = RowKeyCache(max_bytes=2 * 8 * len(frame))
+    with cache:
+        for col in ["a", "b", "a"]:
+            core._hash_rows(frame, [col])
+        core._hash_rows(frame, ["a", "b"])
+
+    info = cache.info()
+    assert info.hits == 1
+    assert info.evictions == 1
+    assert info.nbytes <= cache.max_bytes
+
+
+def test_distinct_cache_dir(frame, tmp_path):
+
+    left, right = frame.iloc[:300], frame.iloc[200:]
+    cache = DiskCache(tmp_path)
+
+    first = core.distinct(left, right, subset=["a", "s"], cache_dir=cache)
+    second = core.distinct(
+        left.copy(), right.copy(), subset=["a", "s"], cache_dir=cache
+    )
+    other = core.distinct(left, right, subset=["a"], cache_dir=cache)
+
+    assert (cache.hits, cache.misses) == (1, 2)
+    pd.testing.assert_frame_equal(first[0], second[0])
+    pd.testing.assert_frame_equal(first[1], second[1])
+    assert other[0].equals(core.distinct(left, right, subset=["a"])[0])
+
+
+def test_distinct_cache_dir_matched(tmp_path):
+
+    left = pd.Series([1, 2, 2, 3])
+    right = pd.Series([2, 3, 4])
+
+    expected = core.distinct(left, right, return_matched=True)
+    core.distinct(left, right, return_matched=True, cache_dir=tmp_path)
+    out = core.distinct(left, right, return_matched=True, cache_dir=tmp_path)
+
+    pd.testing.assert_series_equal(out[0], expected[0])
+    pd.testing.assert_frame_equal(out[2], expected[2])
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_distinct_cache_dir_object_types(tmp_path):
+
+    left = pd.DataFrame({"a": pd.Series([1, 2], dtype=object)})
+    strings = pd.DataFrame({"a": ["1", "2"]}, dtype=object)
+
+    core.distinct(left, left.copy(), cache_dir=tmp_path)
+    out_left, out_right = core.distinct(left, strings, cache_dir=tmp_path)
+
+    pd.testing.assert_frame_equal(out_left, left)
+    pd.testing.assert_frame_equal(out_right, strings)
+
+
+def test_distinct_cache_dir_other_objects(tmp_path):
+
+    left = pd.Series([(1, 2), (3, 4)])
+    right = pd.Series([(1, 2)])
+
+    out = core.distinct(left, right, cache_dir=tmp_path)
+
+    pd.testing.assert_series_equal(out[0], left.iloc[[1]])
+    assert not list(tmp_path.iterdir())
+
+
+def test_disk_cache_eviction(tmp_path):
+
+    cache = DiskCache(tmp_path, max_bytes=3_000)
+    for i in range(5):
+        cache.put(str(i), [np.arange(100)])
+
+    assert cache.nbytes <= 3_000
+    assert cache.get("4") is not None
+    assert cache.get("0") is None
+
+
+def test_distinct_cache_dir_unsupported(frame, tmp_path):
+
+    with pytest.raises(ValueError):
+        core.distinct(frame, frame, by=["a"], cache_dir=tmp_path)
@@ -1,3 +1,6 @@
+import asyncio
+
+import numpy as np
 import pandas as pd
 from pandas_distinct import core
 import pytest
@@ -97,6 +100,552 @@ def test_distinct_subset_2():
     _assert_df((out_left, out_left_expected), (out_right, out_right_expected))
 
 
+def test_distinct_series():
+
+    left = pd.Series([1, 2, 2, 3], index=list("abcd"), name="id")
+    right = pd.Series([2, 4, 1], index=list("xyz"), name="id")
+
+    out_left, out_right = core.distinct(left, right)
+
+    pd.testing.assert_series_equal(out_left, left.iloc[[2, 3]])
+    pd.testing.assert_series_equal(out_right, right.iloc[[1]])
+
+
+@pytest.mark.parametrize("box", [pd.Index, np.asarray, list])
+def test_distinct_1d(box):
+
+    out_left, out_right = core.distinct(box([1, 2, 2, 3]), box([2, 4, 1]))
+
+    assert list(out_left) == [2, 3]
+    assert list(out_right) == [4]
+
+
+def test_distinct_single_column_matches_tuples():
+
+    rng = np.random.default_rng(0)
+    left = pd.DataFrame({"id": rng.integers(0, 5, 50), "k": 0})
+    right = pd.DataFrame({"id": rng.integers(0, 5, 40), "k": 0})
+
+    out_left, out_right = core.distinct(left, right, subset=["id"])
+    exp_left, exp_right = core.distinct(left, right, subset=["id", "k"])
+
+    pd.testing.assert_frame_equal(out_left, exp_left)
+    pd.testing.assert_frame_equal(out_right, exp_right)
+
+
+@pytest.mark.parametrize("subset", [["a"], ["a", "b"], None])
+def test_distinct_missing_values(subset):
+
+    left = pd.DataFrame({"a": [1.0, np.nan], "b": [0, 0]})
+    right = pd.DataFrame({"a": [np.nan, 2.0], "b": [0, 0]})
+
+    out_left, out_right = core.distinct(left, right, subset=subset)
+
+    # missing values are equal, on every path
+    pd.testing.assert_frame_equal(out_left, left.iloc[[0]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[1]])
+
+
+@pytest.mark.parametrize("func", [core.distinct, core.distinct_counter])
+def test_distinct_categorical(func):
+
+    left = pd.DataFrame({
+        "a": pd.Categorical(["x", "y", "y", None]),
+        "b": [1, 1, 2, 3],
+    })
+    right = pd.DataFrame({
+        "a": pd.Categorical(["z", "y", None], categories=["z", "y"]),
+        "b": [1, 1, 3],
+    })
+
+    out_left, out_right = func(left, right)
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[0, 2]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[0]])
+
+
+def test_distinct_categorical_series():
+
+    left = pd.Series(["x", "y", "y"], dtype="category")
+    right = pd.Series(["y", "w"], dtype="category")
+
+    out_left, out_right = core.distinct(left, right)
+
+    pd.testing.assert_series_equal(out_left, left.iloc[[0, 2]])
+    pd.testing.assert_series_equal(out_right, right.iloc[[1]])
+
+
+@pytest.mark.parametrize("hash_bits", [64, 128])
+def test_distinct_counter_hash_bits(hash_bits):
+
+    left = pd.DataFrame({"a": [1, 1, 2], "b": ["x", "y", "y"]})
+    right = pd.DataFrame({"a": [1, 2, 2], "b": ["y", "y", "z"]})
+
+    out_left, out_right = core.distinct_counter(
+        left, right, hash_bits=hash_bits
+    )
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[0]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[2]])
+
+
+def test_distinct_counter_hash_bits_invalid():
+
+    left = pd.DataFrame({"a": [1]})
+
+    with pytest.raises(ValueError):
+        core.distinct_counter(left, left, hash_bits=32)
+
+
+def test_distinct_counter_verify_collisions(monkeypatch):
+
+    def colliding_hash(df, subset=None, hash_bits=64):
+        return np.zeros(len(df), dtype=np.uint64)
+
+    monkeypatch.setattr(core, "_hash_rows", colliding_hash)
+
+    left = pd.DataFrame({"a": [1, 2, 2, 3], "b": [0.5, np.nan, np.nan, 1.0]})
+    right = pd.DataFrame({"a": [2, 3, 4], "b": [np.nan, 1.0, 1.0]})
+
+    out_left, out_right = core.distinct_counter(left, right, verify=True)
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[0, 2]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[2]])
+
+
+def test_distinct_counter_max_diff():
+
+    left = pd.DataFrame({"a": range(100)})
+    right = pd.DataFrame({"a": range(50, 150)})
+
+    out_left, out_right = core.distinct_counter(
+        left, right, max_diff=10, chunksize=10
+    )
+
+    assert out_left.attrs["truncated"] and out_right.attrs["truncated"]
+    # stops after the first chunk, all its rows are distinct
+    pd.testing.assert_frame_equal(out_left, left.iloc[:10])
+    assert "truncated" not in left.attrs
+
+
+def test_distinct_counter_max_diff_complete():
+
+    left = pd.DataFrame({"a": range(20)})
+    right = pd.DataFrame({"a": range(50, 70)})
+
+    out_left, out_right = core.distinct_counter(
+        left, right, max_diff=10, chunksize=20
+    )
+
+    # past max_diff, but only after reading the whole of left
+    assert not out_left.attrs["truncated"]
+    pd.testing.assert_frame_equal(out_left, left)
+    pd.testing.assert_frame_equal(out_right, right)
+
+
+def test_distinct_counter_max_diff_not_exceeded():
+
+    left = pd.DataFrame({"a": [1, 1, 2, 3, 5]})
+    right = pd.DataFrame({"a": [1, 2, 3, 4, 1]})
+
+    out_left, out_right = core.distinct_counter(
+        left, right, max_diff=2, chunksize=2
+    )
+    exp_left, exp_right = core.distinct_counter(left, right)
+
+    assert not out_left.attrs["truncated"]
+    pd.testing.assert_frame_equal(out_left, exp_left)
+    pd.testing.assert_frame_equal(out_right, exp_right)
+
+
+def test_distinct_counter_limit():
+
+    left = pd.DataFrame({"a": range(10)})
+    right = pd.DataFrame({"a": range(5, 20)})
+
+    out_left, out_right = core.distinct_counter(left, right, limit=3)
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[:3])
+    pd.testing.assert_frame_equal(out_right, right.iloc[5:8])
+
+
+def test_distinct_many_two_frames():
+
+    left = pd.DataFrame({"a": [1, 1, 2, 3], "b": [0, 0, 1, 1]})
+    right = pd.DataFrame({"a": [1, 2, 2], "b": [0, 1, 1]})
+
+    out = core.distinct_many([left, right])
+    expected = core.distinct_counter(left, right)
+
+    for obtained, exp in zip(out, expected):
+        pd.testing.assert_frame_equal(obtained, exp)
+
+
+@pytest.mark.parametrize("baseline, expected", [
+    ("min", [[1, 3], [2], [2, 3]]),
+    ("majority", [[1, 3], [], [2]]),
+    (1, [[1, 3], [], [2]]),
+])
+def test_distinct_many(baseline, expected):
+
+    frames = [
+        pd.DataFrame({"x": [1, 1, 2, 3]}),
+        pd.DataFrame({"x": [1, 2, 4]}),
+        pd.DataFrame({"x": [1, 2, 2, 4]}),
+    ]
+
+    out = core.distinct_many(frames, baseline=baseline)
+
+    assert [df.index.tolist() for df in out] == expected
+
+
+def test_distinct_many_dtypes():
+
+    frames = [
+        pd.DataFrame({"x": [1, 2, 3], "y": ["a", "b", "c"]}),
+        pd.DataFrame({"y": ["a", "b", "d"], "x": [1.0, 2.0, 3.0]}),
+        pd.DataFrame({"x": np.array([1, 2, 3], dtype=np.uint8),
+                      "y": pd.Categorical(["a", "b", "c"])}),
+    ]
+
+    out = core.distinct_many(frames, baseline="majority")
+
+    assert [df.index.tolist() for df in out] == [[], [2], []]
+
+
+def test_distinct_many_bad_baseline():
+
+    with pytest.raises(ValueError):
+        core.distinct_many([pd.DataFrame({"x": [1]})], baseline="max")
+
+
+def test_distinct_keyed():
+
+    left = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "x": [1.0, np.nan, 3.0, 4.0],
+        "y": pd.Categorical(["a", "b", "c", "d"]),
+    })
+    right = pd.DataFrame({
+        "id": [4, 3, 2, 5],
+        "x": [4.5, 3.0, np.nan, 5.0],
+        "y": pd.Categorical(["z", "c", "b", "e"]),
+    })
+
+    deleted, inserted, changes = core.distinct(left, right, on=["id"])
+
+    pd.testing.assert_frame_equal(deleted, left.iloc[[0]])
+    pd.testing.assert_frame_equal(inserted, right.iloc[[3]])
+    expected = pd.DataFrame({
+        "id": [4, 4],
+        "column": ["x", "y"],
+        "left": [4.0, "d"],
+        "right": [4.5, "z"],
+    })
+    pd.testing.assert_frame_equal(changes, expected)
+
+
+def test_distinct_keyed_compare():
+
+    left = pd.DataFrame({"id": [1, 1], "x": [1, 2], "y": [0, 0]})
+    right = pd.DataFrame({"id": [1], "x": [1], "y": [9]})
+
+    deleted, inserted, changes = core.distinct_keyed(
+        left, right, on=["id"], compare=["x"]
+    )
+
+    pd.testing.assert_frame_equal(deleted, left.iloc[[1]])
+    assert inserted.empty and changes.empty
+    assert changes.columns.tolist() == ["id", "column", "left", "right"]
+
+
+def test_distinct_keyed_key_dtypes():
+
+    left = pd.DataFrame({"id": [1, 2, 3], "x": [10, 20, 30]})
+    right = pd.DataFrame({"id": [2.0, 3.0, 4.0], "x": [20, 31, 40]})
+
+    deleted, inserted, changes = core.distinct(left, right, on=["id"])
+
+    pd.testing.assert_frame_equal(deleted, left.iloc[[0]])
+    pd.testing.assert_frame_equal(inserted, right.iloc[[2]])
+    assert changes[["id", "left", "right"]].values.tolist() == [[3, 30, 31]]
+
+
+def test_distinct_keyed_exact_keys(monkeypatch):
+
+    def colliding_hashes(df, *args, **kwargs):
+        return np.zeros(len(df), dtype=np.uint64)
+
+    # rows hashing alike must not match different keys
+    monkeypatch.setattr(core, "_hash_rows", colliding_hashes)
+    left = pd.DataFrame({"id": [1, 2, None], "k": ["a", "b", "c"],
+                         "x": [10, 20, 30]})
+    right = pd.DataFrame({"id": [2, 5, np.nan], "k": ["b", "b", "c"],
+                          "x": [21, 50, 30]})
+
+    deleted, inserted, changes = core.distinct(left, right, on=["id", "k"])
+
+    pd.testing.assert_frame_equal(deleted, left.iloc[[0]])
+    pd.testing.assert_frame_equal(inserted, right.iloc[[1]])
+    assert changes[["k", "left", "right"]].values.tolist() == [["b", 20, 21]]
+
+
+def test_distinct_void():
+
+    left = pd.DataFrame({"a": [1, 1, 2, 3], "b": [0.0, 0.0, np.nan, 1.5]})
+    right = pd.DataFrame({"a": [1, 2, 4], "b": [-0.0, np.nan, 1.5]})
+
+    out_left, out_right = core.distinct_void(left, right)
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[1, 3]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[2]])
+
+
+def test_distinct_void_structured_memmap(tmp_path):
+
+    dtype = [("id", "i8"), ("x", "f4"), ("note", "i2")]
+    left = np.array([(1, 0.5, 7), (2, 1.0, 7), (2, 1.0, 8)], dtype=dtype)
+    right = np.array([(2, 1.0, 0), (3, 0.5, 0)], dtype=dtype)
+
+    path = tmp_path / "left.bin"
+    left.tofile(path)
+    left_map = np.memmap(path, dtype=dtype, mode="r")
+
+    out_left, out_right = core.distinct_void(
+        left_map, right, subset=["id", "x"]
+    )
+
+    np.testing.assert_array_equal(out_left, left[[0, 2]])
+    np.testing.assert_array_equal(out_right, right[[1]])
+
+
+def test_distinct_void_rejects_objects():
+
+    left = pd.DataFrame({"a": ["x"]})
+
+    with pytest.raises(TypeError):
+        core.distinct_void(left, left)
+
+
+def test_distinct_void_mixed_dtypes():
+
+    left = pd.DataFrame({"a": [1, 2, 2 ** 53 + 1]})
+    right = pd.DataFrame({"a": [1.0, 2.5]})
+
+    out_left, out_right = core.distinct_void(left.iloc[:2], right)
+    pd.testing.assert_frame_equal(out_left, left.iloc[[1]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[1]])
+
+    with pytest.raises(TypeError, match="exactly"):
+        core.distinct_void(left, right)
+    big = pd.DataFrame({"a": np.array([2 ** 63], dtype=np.uint64)})
+    out_left, out_right = core.distinct_void(big, left)
+    assert len(out_left) == 1 and len(out_right) == 3
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 64])
+def test_distinct_merkle(block_size):
+
+    rng = np.random.default_rng(3)
+    left = pd.DataFrame(rng.integers(0, 4, (200, 2)))
+    right = left.copy()
+    right.iloc[17] = [9, 9]
+    right = pd.concat([right, left.iloc[[5, 50]]], ignore_index=True)
+    right = right.drop(index=[80, 81]).reset_index(drop=True)
+
+    out_left, out_right = core.distinct_merkle(
+        left, right, block_size=block_size
+    )
+    exp_left, exp_right = core.distinct(left, right)
+
+    pd.testing.assert_frame_equal(out_left, exp_left)
+    pd.testing.assert_frame_equal(out_right, exp_right)
+
+
+def test_distinct_merkle_equal():
+
+    left = pd.DataFrame({"a": range(10)})
+
+    out_left, out_right = core.distinct_merkle(left, left.copy())
+
+    assert out_left.empty and out_right.empty
+
+
+def test_distinct_lazy():
+
+    left = pd.DataFrame([[1, 2, 3], [1, 2, 33], [4, 5, 6]])
+    right = pd.DataFrame([[1, 2, 3], [1, 2, 3]])
+
+    result = core.distinct(left, right, lazy=True)
+
+    assert "left_only" not in vars(result)
+    pd.testing.assert_frame_equal(result[-1], right.iloc[[1]])
+    assert "left_only" not in vars(result)
+    out_left, out_right = result
+    assert result.left_only is out_left
+    pd.testing.assert_frame_equal(out_left, left.iloc[[1, 2]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[1]])
+    assert result.left_mask.tolist() == [False, True, True]
+    assert result.right_mask.tolist() == [False, True]
+    assert result.counts.loc["left"].tolist() == [3, 2, 1]
+    assert result.summary().loc["right", "only_pct"] == 50
+
+
+def test_distinct_return_matched():
+
+    left = pd.DataFrame([[1, 2], [1, 2], [3, 4], [5, 6]])
+    right = pd.DataFrame([[3, 4], [1, 2], [7, 8], [1, 2]])
+
+    out_left, out_right, matched = core.distinct(
+        left, right, return_matched=True
+    )
+
+    assert matched.to_dict("list") == {"left": [0, 1, 2], "right": [3, 1, 0]}
+    pd.testing.assert_frame_equal(out_left, left.iloc[[3]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[2]])
+
+
+def test_distinct_return_matched_single_column():
+
+    rng = np.random.default_rng(4)
+    left = pd.DataFrame({"id": rng.integers(0, 5, 60), "k": 0})
+    right = pd.DataFrame({"id": rng.integers(0, 5, 50), "k": 0})
+
+    result = core.distinct(left, right, subset=["id"], lazy=True,
+                           return_matched=True)
+    expected = core.distinct(left, right, return_matched=True)
+
+    assert len(result) == 3
+    assert result[1:] == (result.right_only, result.matched)
+    pd.testing.assert_frame_equal(result.matched, expected[2])
+    assert len(result.matched) == len(left) - len(result.left_only)
+
+
+def test_distinct_by():
+
+    rng = np.random.default_rng(5)
+    left = pd.DataFrame({
+        "account": rng.integers(0, 4, 80),
+        "a": rng.integers(0, 3, 80),
+        "b": rng.integers(0, 2, 80),
+    })
+    right = pd.DataFrame({
+        "account": rng.integers(0, 5, 70),
+        "a": rng.integers(0, 3, 70),
+        "b": rng.integers(0, 2, 70),
+    })
+    calls = []
+
+    result = core.distinct_by(
+        left, right, by=["account"], lazy=True, return_matched=True,
+        progress=lambda done, total: calls.append((done, total)),
+    )
+
+    expected = core.distinct_counter(left, right)
+    assert len(result.left_only) == len(expected[0])
+    assert len(result.right_only) == len(expected[1])
+    for account, group in left.groupby("account"):
+        exp_left, exp_right = core.distinct(
+            group, right[right.account == account]
+        )
+        pd.testing.assert_frame_equal(
+            result.left_only[result.left_only.account == account], exp_left
+        )
+    pairs = result.matched
+    left_rows = left.iloc[pairs.left].to_numpy()
+    assert (left_rows == right.iloc[pairs.right].to_numpy()).all()
+    assert calls[-1] == (5, 5)
+
+
+def test_distinct_by_batches(monkeypatch):
+
+    monkeypatch.setattr(core, "_BATCH_ROWS", 16)
+    rng = np.random.default_rng(8)
+    left = pd.DataFrame({
+        "g": rng.integers(0, 30, 300), "a": rng.integers(0, 3, 300),
+        "b": rng.choice([0.0, np.nan], 300),
+    })
+    right = pd.DataFrame({
+        "g": rng.integers(0, 40, 250), "a": rng.integers(0, 3, 250),
+        "b": rng.choice([0.0, np.nan], 250),
+    })
+    calls = []
+
+    result = core.distinct_by(
+        left, right, by=["g"], lazy=True, return_matched=True,
+        progress=lambda done, total: calls.append((done, total)),
+    )
+
+    exp_left, exp_right = [], []
+    for g in range(40):
+        out = core.distinct(left[left.g == g], right[right.g == g])
+        exp_left.append(out[0])
+        exp_right.append(out[1])
+    pd.testing.assert_frame_equal(
+        result.left_only, pd.concat(exp_left).sort_index()
+    )
+    pd.testing.assert_frame_equal(
+        result.right_only, pd.concat(exp_right).sort_index()
+    )
+    pairs = result.matched
+    pd.testing.assert_frame_equal(
+        left.iloc[pairs.left].reset_index(drop=True),
+        right.iloc[pairs.right].reset_index(drop=True),
+    )
+    assert len(calls) > 1
+    assert calls[-1] == (40, 40)
+
+
+def test_distinct_by_keyword():
+
+    left = pd.DataFrame({"g": [1, 1, 2], "x": [1, 2, 1]})
+    right = pd.DataFrame({"g": [2, 1], "x": [1, 1]})
+
+    out_left, out_right = core.distinct(left, right, by=["g"])
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[1]])
+    assert out_right.empty
+
+
+def test_distinct_by_process_pool():
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    left = pd.DataFrame({"g": [1, 1, 2, 3], "x": [1, 2, 1, 5]})
+    right = pd.DataFrame({"g": [2, 1, 4], "x": [1, 1, 0]})
+
+    with ProcessPoolExecutor(2) as executor:
+        out_left, out_right = core.distinct_by(
+            left, right, by=["g"], executor=executor
+        )
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[1, 3]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[2]])
+
+
+def test_distinct_dask():
+
+    dd = pytest.importorskip("dask.dataframe")
+
+    rng = np.random.default_rng(6)
+    left = pd.DataFrame(rng.integers(0, 5, (200, 2)), columns=["a", "b"])
+    right = pd.DataFrame(rng.integers(0, 5, (150, 2)), columns=["a", "b"])
+
+    out_left, out_right = core.distinct(
+        dd.from_pandas(left, npartitions=3),
+        dd.from_pandas(right, npartitions=2),
+    )
+    exp_left, exp_right = core.distinct_counter(left, right)
+
+    for obtained, expected in [(out_left, exp_left), (out_right, exp_right)]:
+        obtained = obtained.compute()
+        # same multiset of rows, taken from the original ones
+        pd.testing.assert_frame_equal(
+            obtained.sort_values(["a", "b"]).reset_index(drop=True),
+            expected.sort_values(["a", "b"]).reset_index(drop=True),
+        )
+
+
 def test_distinct_pandas():
 
     left = pd.DataFrame([[1, 2, 3], [1, 2, 33]])
@@ -114,8 +663,8 @@ def test_distinct_counter():
     right = pd.DataFrame([[1, 2, 3], [1, 2, 3]])
 
     # expected
-    out_left_expected = pd.DataFrame([[1, 2, 33]], columns=columns)
-    out_right_expected = pd.DataFrame([[1, 2, 3]], columns=columns)
+    out_left_expected = pd.DataFrame([[1, 2, 33]], index=[1], columns=columns)
+    out_right_expected = pd.DataFrame([[1, 2, 3]], index=[1], columns=columns)
 
     # obtained
     out_left, out_right = core.distinct_counter(left, right, subset=[0, 1, 2])
@@ -123,6 +672,85 @@ def test_distinct_counter():
     _assert_df((out_left, out_left_expected), (out_right, out_right_expected))
 
 
+def test_distinct_counter_subset_keeps_dtypes():
+
+    left = pd.DataFrame(
+        {
+            "a": [1, 1, 2],
+            "b": pd.Categorical(["x", "x", "y"]),
+            "c": pd.date_range("2020", periods=3, tz="UTC"),
+        },
+        index=["p", "q", "r"],
+    )
+    right = pd.DataFrame(
+        {
+            "a": [1, 2],
+            "b": pd.Categorical(["x", "y"]),
+            "c": pd.date_range("2021", periods=2, tz="UTC"),
+        },
+        index=["s", "t"],
+    )
+
+    out_left, out_right = core.distinct_counter(left, right, subset=["a", "b"])
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[1]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[]])
+
+
+@pytest.mark.parametrize("func", [core.distinct, core.distinct_counter])
+def test_distinct_equal_values_of_other_dtypes(func):
+
+    left = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    right = pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]})
+
+    out_left, out_right = func(left, right)
+
+    assert out_left.empty and out_right.empty
+
+
+@pytest.mark.parametrize("func", [core.distinct, core.distinct_counter])
+@pytest.mark.parametrize("subset", [None, ["a"]])
+@pytest.mark.parametrize("values", [
+    (np.array([2 ** 62 + 1], dtype=np.int64),
+     np.array([2 ** 62], dtype=np.uint64)),
+    (np.array([2 ** 53 + 1]), np.array([2.0 ** 53])),
+])
+def test_distinct_large_integers_of_other_dtypes(func, subset, values):
+
+    left = pd.DataFrame({"a": values[0], "b": [0]})
+    right = pd.DataFrame({"a": values[1], "b": [0]})
+
+    out_left, out_right = func(left, right, subset=subset)
+
+    pd.testing.assert_frame_equal(out_left, left)
+    pd.testing.assert_frame_equal(out_right, right)
+
+
+@pytest.mark.parametrize("func", [core.distinct, core.distinct_counter])
+@pytest.mark.parametrize("subset", [None, ["a"]])
+def test_distinct_datetime_units(func, subset):
+
+    dates = pd.to_datetime(["2020-01-01 00:00", "2021-06-01 12:00"])
+    left = pd.DataFrame({"a": dates.as_unit("ns"), "b": [0, 1]})
+    right = pd.DataFrame({"a": dates.as_unit("us"), "b": [0, 1]})
+
+    out_left, out_right = func(left, right, subset=subset)
+
+    assert out_left.empty and out_right.empty
+
+
+@pytest.mark.parametrize("func", [core.distinct, core.distinct_counter])
+def test_distinct_object_values_of_other_types(func):
+
+    left = pd.DataFrame({"a": pd.Series([1, 2], dtype=object)})
+    right = pd.DataFrame({"a": ["1", "2"]}, dtype=object)
+
+    out_left, out_right = func(left, right)
+
+    pd.testing.assert_frame_equal(out_left, left)
+    pd.testing.assert_frame_equal(out_right, right)
+
+
 @pytest.mark.xfail(AssertionError, reason="bug: lost original index")
 def test_distinct_counter_alt():
 
@@ -146,3 +774,193 @@ def test_distinct_counter_alt():
     out_right_expected = pd.DataFrame([], columns=columns, index=[])
 
     _assert_df((out_left, out_left_expected), (out_right, out_right_expected))
+
+
+@pytest.mark.parametrize("subset", [None, ["a"]])
+def test_distinct_index(subset):
+
+    rng = np.random.default_rng(7)
+    reference = pd.DataFrame(rng.integers(0, 6, (400, 2)), columns=["a", "b"])
+    index = core.DistinctIndex(reference, subset=subset)
+
+    for n in [0, 50, 300]:
+        other = pd.DataFrame(rng.integers(0, 8, (n, 2)), columns=["a", "b"])
+        out = index.diff(other)
+        expected = core.distinct_counter(other, reference, subset=subset)
+
+        pd.testing.assert_frame_equal(out[0], expected[0])
+        pd.testing.assert_frame_equal(out[1], expected[1])
+
+
+def test_distinct_index_dtypes():
+
+    reference = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", None]})
+    index = core.DistinctIndex(reference)
+
+    other = pd.DataFrame({
+        "b": pd.Categorical(["x", "y", np.nan]), "a": [1.0, 2.0, 3.5],
+    })
+    out = index.diff(other)
+    expected = core.distinct_counter(other[["a", "b"]], reference)
+
+    pd.testing.assert_frame_equal(out[0], other.iloc[[2]])
+    pd.testing.assert_frame_equal(out[1], reference.iloc[[2]])
+    assert [len(frame) for frame in expected] == [1, 1]
+    with pytest.raises(ValueError, match="missing"):
+        index.diff(other[["a"]])
+
+
+def test_distinct_index_threads():
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    rng = np.random.default_rng(8)
+    reference = pd.DataFrame(rng.integers(0, 6, (1000, 2)))
+    others = [pd.DataFrame(rng.integers(0, 6, (200, 2))) for _ in range(16)]
+    index = core.DistinctIndex(reference)
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(
+            lambda other: index.diff(other, lazy=True), others
+        ))
+
+    for other, res in zip(others, results):
+        expected = core.distinct_counter(other, reference)
+        pd.testing.assert_frame_equal(res.left_only, expected[0])
+        pd.testing.assert_frame_equal(res.right_only, expected[1])
+
+
+def test_incremental_distinct():
+
+    rng = np.random.default_rng(9)
+    left = pd.DataFrame(rng.integers(0, 4, (60, 2)), columns=["a", "b"])
+    right = pd.DataFrame(rng.integers(0, 4, (50, 2)), columns=["a", "b"])
+    appended = pd.DataFrame(rng.integers(0, 4, (10, 2)), columns=["a", "b"])
+
+    inc = core.IncrementalDistinct(left, right)
+    inc.append_left(appended)
+    inc.delete_left([0, 5, 65])
+    inc.delete_right(np.arange(10))
+    inc.append_right(appended.iloc[:4])
+
+    new_left = pd.concat([left, appended], ignore_index=True).drop([0, 5, 65])
+    new_right = pd.concat([right.iloc[10:], appended.iloc[:4]])
+    expected_left, expected_right = core.distinct_counter(new_left, new_right)
+    out_left, out_right = inc.result()
+
+    np.testing.assert_array_equal(inc.positions()[0], expected_left.index)
+    pd.testing.assert_frame_equal(
+        out_left.reset_index(drop=True),
+        expected_left.reset_index(drop=True),
+    )
+    assert len(out_right) == len(expected_right)
+
+
+def test_incremental_distinct_delete_twice():
+
+    inc = core.IncrementalDistinct(
+        pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [2]})
+    )
+    inc.delete_left([1])
+
+    with pytest.raises(KeyError):
+        inc.delete_left([1])
+    with pytest.raises(IndexError):
+        inc.delete_right([3])
+    # nothing is deleted when a position is invalid
+    with pytest.raises(KeyError):
+        inc.delete_left([0, 1])
+    assert inc.positions()[0].tolist() == [0]
+
+
+def test_incremental_distinct_dtypes():
+
+    inc = core.IncrementalDistinct(
+        pd.DataFrame({"a": [1.0, 2.0]}), pd.DataFrame({"a": [2]})
+    )
+    inc.append_right(pd.DataFrame({"a": [1]}))
+    inc.append_left(pd.DataFrame({"a": [3]}))
+
+    assert [len(out) for out in inc.result()] == [1, 0]
+    inc.append_right(pd.DataFrame({"a": ["1"]}))
+    assert [len(out) for out in inc.result()] == [1, 1]
+    with pytest.raises(ValueError, match="columns"):
+        inc.append_right(pd.DataFrame({"b": [1]}))
+
+
+def test_incremental_distinct_categorical():
+
+    left = pd.DataFrame({"a": pd.Categorical(["x", "y", "x"]), "b": [1, 2, 3]})
+    right = pd.DataFrame({"a": pd.Categorical(["y", "z"]), "b": [2, 4]})
+    inc = core.IncrementalDistinct(left, right)
+
+    inc.append_left(left.iloc[[0]])
+    inc.append_right(pd.DataFrame({"a": ["x", "x"], "b": [1, 3]}))
+    inc.append_right(pd.DataFrame({
+        "a": pd.Categorical(["x"], categories=["w", "x"]), "b": [1.0],
+    }))
+
+    out_left, out_right = inc.result()
+    assert out_left.empty
+    assert out_right["a"].astype(str).tolist() == ["z"]
+
+
+def test_adistinct():
+
+    left = pd.DataFrame({"a": [1, 1, 2, 3], "b": [0, 0, 1, 1]})
+    right = pd.DataFrame({"a": [1, 2, 2], "b": [0, 1, 1]})
+    calls = []
+
+    out_left, out_right = asyncio.run(core.adistinct(
+        left, right, chunksize=2,
+        progress=lambda done, total: calls.append((done, total)),
+    ))
+    exp_left, exp_right = core.distinct(left, right)
+
+    pd.testing.assert_frame_equal(out_left, exp_left)
+    pd.testing.assert_frame_equal(out_right, exp_right)
+    assert calls == [(i, 6) for i in range(1, 7)]
+
+
+def test_adistinct_max_diff():
+
+    left = pd.DataFrame({"a": range(100)})
+    right = pd.DataFrame({"a": range(50, 150)})
+
+    out_left, out_right = asyncio.run(core.adistinct(
+        left, right, chunksize=10, max_diff=10, limit=5
+    ))
+
+    assert out_left.attrs["truncated"]
+    pd.testing.assert_frame_equal(out_left, left.iloc[:5])
+
+
+def test_adistinct_max_diff_complete():
+
+    left = pd.DataFrame({"a": range(20)})
+    right = pd.DataFrame({"a": range(50, 70)})
+
+    out_left, out_right = asyncio.run(core.adistinct(
+        left, right, chunksize=20, max_diff=10
+    ))
+
+    assert not out_left.attrs["truncated"]
+    pd.testing.assert_frame_equal(out_left, left)
+    pd.testing.assert_frame_equal(out_right, right)
+
+
+def test_adistinct_cancel():
+
+    left = pd.DataFrame({"a": range(1000)})
+    right = pd.DataFrame({"a": range(1, 1001)})
+
+    async def main():
+        task = asyncio.ensure_future(
+            core.adistinct(left, right, chunksize=1)
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main())
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas_distinct import core, sketch
+
+
+def test_estimate_distinct_exact():
+
+    left = pd.DataFrame({"a": [1, 1, 2, 3], "b": [0, 0, 1, 1]})
+    right = pd.DataFrame({"a": [1, 2, 4], "b": [0, 1, 1]})
+
+    est = sketch.estimate_distinct(left, right, chunksize=2)
+
+    assert est == (2, 1, 0)
+
+
+def test_estimate_distinct_bounds():
+
+    rng = np.random.default_rng(1)
+    left = pd.DataFrame(rng.integers(0, 300, (30_000, 2)))
+    right = pd.DataFrame(rng.integers(0, 300, (25_000, 2)))
+
+    est = sketch.estimate_distinct(left, right, size=512, chunksize=4096)
+    out_left, out_right = core.distinct_counter(left, right)
+
+    assert est.left_only - est.right_only == 5_000
+    assert abs(est.left_only - len(out_left)) <= 2 * est.error
+    assert abs(est.right_only - len(out_right)) <= 2 * est.error
+
+
+def test_distinct_iblt():
+
+    rng = np.random.default_rng(2)
+    left = pd.DataFrame(rng.integers(0, 50, (5_000, 2)))
+    right = pd.concat([left.iloc[30:], left.iloc[:10]], ignore_index=True)
+    right.iloc[::500, 0] = -1
+
+    out_left, out_right = sketch.distinct_iblt(left, right, size=300)
+    exp_left, exp_right = core.distinct_counter(left, right)
+
+    pd.testing.assert_frame_equal(out_left, exp_left)
+    pd.testing.assert_frame_equal(out_right, exp_right)
+
+
+def test_distinct_iblt_dtypes():
+
+    left = pd.DataFrame({"a": [1, 2, 3, 4], "b": ["w", "x", "y", "z"]})
+    right = pd.DataFrame({
+        "b": pd.Categorical(["x", "y", "z", "z"]),
+        "a": [2.0, 3.0, 4.5, 4.0],
+    })
+
+    out_left, out_right = sketch.distinct_iblt(left, right, size=30)
+    est = sketch.estimate_distinct(left, right)
+
+    pd.testing.assert_frame_equal(out_left, left.iloc[[0]])
+    pd.testing.assert_frame_equal(out_right, right.iloc[[2]])
+    assert est == (1, 1, 0)
+
+
+def test_iblt_serialization():
+
+    left = pd.DataFrame({"a": [1, 2, 2, 3]})
+    right = pd.DataFrame({"a": [2, 3, 4]})
+
+    data = sketch.encode_rows(left, size=30).to_bytes()
+    diff = sketch.IBLT.from_bytes(data) - sketch.encode_rows(right, size=30)
+    left_only, right_only = diff.decode()
+
+    right_elements = sketch.row_elements(right)
+    assert len(left_only) == 2
+    assert np.flatnonzero(np.isin(right_elements, right_only)).tolist() == [2]
+
+
+def test_iblt_too_small():
+
+    left = pd.DataFrame({"a": range(1_000)})
+    right = pd.DataFrame({"a": range(1_000, 2_000)})
+
+    with pytest.raises(ValueError):
+        sketch.distinct_iblt(left, right, size=30)
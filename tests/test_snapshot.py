@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas_distinct import core, snapshot
+
+
+@pytest.fixture
+def frames(random_frames):
+    return random_frames(5, 300, 250)
+
+
+@pytest.mark.parametrize("subset", [None, ["a", "b"]])
+@pytest.mark.parametrize("chunksize", [7, 1_000])
+def test_distinct_against_snapshot(frames, tmp_path, subset, chunksize):
+
+    left, right = frames
+    path = tmp_path / "right.snap"
+    snapshot.save_snapshot(right, path, subset=subset)
+
+    out_left, out_right = snapshot.distinct_against_snapshot(
+        left, path, chunksize=chunksize
+    )
+    expected_left, expected_right = core.distinct_counter(
+        left, right, subset=subset
+    )
+
+    pd.testing.assert_frame_equal(out_left, expected_left)
+    np.testing.assert_array_equal(out_right, expected_right.index)
+
+
+def test_snapshot_size(frames, tmp_path):
+
+    _, right = frames
+    path = tmp_path / "right.snap"
+    snapshot.save_snapshot(right, path)
+
+    assert path.stat().st_size < 12 * len(right) + 1024
+
+
+def test_snapshot_dtype_mismatch(frames, tmp_path):
+
+    left, right = frames
+    path = tmp_path / "right.snap"
+    snapshot.save_snapshot(right, path)
+
+    with pytest.raises(ValueError, match="dtypes"):
+        snapshot.distinct_against_snapshot(left.astype({"a": float}), path)
+
+
+def test_snapshot_hash_scheme_mismatch(frames, tmp_path, monkeypatch):
+
+    left, right = frames
+    path = tmp_path / "right.snap"
+    snapshot.save_snapshot(right, path)
+    monkeypatch.setattr(snapshot, "_hash_scheme", lambda: "0" * 16)
+
+    with pytest.raises(ValueError, match="hashing rows differently"):
+        snapshot.distinct_against_snapshot(left, path)
+
+
+def test_snapshot_empty(frames, tmp_path):
+
+    left, _ = frames
+    path = tmp_path / "empty.snap"
+    snapshot.save_snapshot(left.iloc[:0], path)
+
+    out_left, out_right = snapshot.distinct_against_snapshot(left, path)
+
+    assert len(out_left) == len(left)
+    assert len(out_right) == 0
+
+
+@pytest.mark.parametrize("source", ["frame", "chunks", "parquet"])
+def test_reference_index(frames, tmp_path, source):
+
+    left, right = frames
+    if source == "chunks":
+        right_source = (right.iloc[i:i + 40] for i in range(0, 250, 40))
+    elif source == "parquet":
+        right_source = tmp_path / "right.parquet"
+        right.to_parquet(right_source)
+    else:
+        right_source = right
+
+    index = snapshot.ReferenceIndex.build(
+        right_source, tmp_path / "right.idx", chunksize=30
+    )
+    expected, _ = core.distinct_counter(left, right)
+
+    assert len(index) == len(right)
+    pd.testing.assert_frame_equal(index.anti_join(left), expected)
+
+
+def test_reference_index_count(frames, tmp_path):
+
+    _, right = frames
+    index = snapshot.ReferenceIndex.build(
+        right, tmp_path / "right.idx", subset=["a", "b"]
+    )
+    batch = pd.DataFrame({"a": [0, 9], "b": [0, 9]})
+
+    expected = ((right["a"] == 0) & (right["b"] == 0)).sum()
+    np.testing.assert_array_equal(index.count(batch), [expected, 0])
+
+
+def test_reference_index_kind(frames, tmp_path):
+
+    _, right = frames
+    path = tmp_path / "right.snap"
+    snapshot.save_snapshot(right, path)
+
+    with pytest.raises(ValueError, match="expected 'index'"):
+        snapshot.ReferenceIndex(path)
+
+
+def test_reference_index_empty_source(tmp_path):
+
+    with pytest.raises(ValueError, match="no DataFrame"):
+        snapshot.ReferenceIndex.build(iter([]), tmp_path / "empty.idx")
+
+
+def test_snapshot_without_kind(frames, tmp_path):
+
+    left, right = frames
+    path = tmp_path / "right.snap"
+    keys = core._hash_rows(right)
+    order = np.argsort(keys, kind="stable")
+    snapshot._write_arrays(path, snapshot._frame_meta(right, None), {
+        "keys": keys[order], "positions": order,
+    })
+
+    out_left, _ = snapshot.distinct_against_snapshot(left, path)
+
+    pd.testing.assert_frame_equal(
+        out_left, core.distinct_counter(left, right)[0]
+    )
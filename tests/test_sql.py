@@ -0,0 +1,182 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas_distinct import core, sql
+
+
+@pytest.fixture
+def frames(random_frames):
+    left, right = random_frames(3, 200, 150, high=4)
+    left.loc[5, "a"] = np.nan
+    return left, right
+
+
+@pytest.mark.parametrize("subset", [None, ["a", "b"]])
+def test_distinct_duckdb(frames, subset):
+
+    pytest.importorskip("duckdb")
+    left, right = frames
+    out = core.distinct(left, right, subset=subset, engine="duckdb")
+    expected = core.distinct(left, right, subset=subset)
+
+    pd.testing.assert_frame_equal(out[0], expected[0])
+    pd.testing.assert_frame_equal(out[1], expected[1])
+
+
+def test_distinct_duckdb_missing_values():
+
+    pytest.importorskip("duckdb")
+    left = pd.DataFrame({"a": [1.0, np.nan], "b": [0, 0]})
+    right = pd.DataFrame({"a": [np.nan, 2.0], "b": [0, 0]})
+
+    out = core.distinct(left, right, engine="duckdb")
+
+    pd.testing.assert_frame_equal(out[0], left.iloc[[0]])
+    pd.testing.assert_frame_equal(out[1], right.iloc[[1]])
+    pd.testing.assert_frame_equal(out[0], core.distinct(left, right)[0])
+
+
+def test_distinct_duckdb_lazy(frames):
+
+    pytest.importorskip("duckdb")
+    left, right = frames
+    res = sql.distinct_duckdb(left, right, lazy=True)
+    expected = core.distinct(left, right, lazy=True)
+
+    np.testing.assert_array_equal(res.left_pos, expected.left_pos)
+    np.testing.assert_array_equal(res.right_pos, expected.right_pos)
+
+
+def test_distinct_duckdb_parquet(frames, tmp_path):
+
+    pytest.importorskip("duckdb")
+    left, right = frames
+    path = tmp_path / "left.parquet"
+    left.to_parquet(path, index=False)
+
+    out_left, out_right = sql.distinct_duckdb(path, right)
+    expected_left, expected_right = core.distinct(left, right)
+
+    np.testing.assert_array_equal(out_left.index, expected_left.index)
+    assert list(out_left.columns) == list(left.columns)
+    pd.testing.assert_frame_equal(out_right, expected_right)
+
+
+def test_distinct_engine_unknown(frames):
+
+    with pytest.raises(ValueError):
+        core.distinct(*frames, engine="spark")
+
+
+@pytest.mark.parametrize("options", [
+    {"return_matched": True},
+    {"on": ["a"]},
+    {"by": ["a"]},
+])
+def test_distinct_engine_unsupported_options(frames, options):
+
+    with pytest.raises(ValueError):
+        core.distinct(*frames, engine="duckdb", **options)
+
+
+@pytest.fixture
+def connection(frames):
+    left, right = frames
+    con = sqlite3.connect(":memory:")
+    left.to_sql("l", con, index=False)
+    right.to_sql("r", con, index=False)
+    yield con
+    con.close()
+
+
+@pytest.mark.parametrize("subset", [None, ["a", "b"]])
+def test_distinct_sql(connection, subset):
+
+    left = pd.read_sql("SELECT * FROM l", connection)
+    right = pd.read_sql("SELECT * FROM r", connection)
+
+    out = sql.distinct_sql(
+        connection, "SELECT * FROM l", connection, "SELECT * FROM r",
+        subset=subset, batch_size=17,
+    )
+    expected = core.distinct(left, right, subset=subset)
+
+    pd.testing.assert_frame_equal(out[0], expected[0], check_index_type=False)
+    pd.testing.assert_frame_equal(out[1], expected[1], check_index_type=False)
+
+
+def test_distinct_sql_cursor(connection):
+
+    cursor = connection.cursor()
+    out_left, out_right = sql.distinct_sql(
+        cursor, "SELECT 1 AS a UNION ALL SELECT 2 UNION ALL SELECT 2",
+        connection, "SELECT 2 AS a UNION ALL SELECT 3",
+        batch_size=1,
+    )
+
+    assert out_left.to_dict() == {"a": {0: 1, 2: 2}}
+    assert out_right.to_dict() == {"a": {1: 3}}
+    cursor.execute("SELECT 1")  # still open
+
+
+def _sorted_rows(df, subset=None):
+    df = df[subset or list(df)].astype(object)
+    return sorted(map(tuple, df.where(df.notna(), None).values), key=str)
+
+
+@pytest.mark.parametrize("subset", [None, ["a", "b"]])
+def test_distinct_query_sqlite(connection, subset):
+
+    left = pd.read_sql("SELECT * FROM l", connection)
+    right = pd.read_sql("SELECT * FROM r", connection)
+
+    out_left, out_right = sql.distinct_query(
+        connection, "l", "SELECT * FROM r", subset=subset
+    )
+    expected_left, expected_right = core.distinct(
+        left, right, subset=subset
+    )
+
+    assert list(out_left.columns) == list(left.columns)
+    assert _sorted_rows(out_left, subset) == _sorted_rows(
+        expected_left, subset
+    )
+    assert _sorted_rows(out_right, subset) == _sorted_rows(
+        expected_right, subset
+    )
+
+
+def test_distinct_query_cte(connection):
+
+    out_left, out_right = sql.distinct_query(
+        connection, "l", "WITH t AS (SELECT * FROM r)\nSELECT * FROM t"
+    )
+    expected_left, expected_right = sql.distinct_query(connection, "l", "r")
+
+    assert _sorted_rows(out_left) == _sorted_rows(expected_left)
+    assert _sorted_rows(out_right) == _sorted_rows(expected_right)
+
+
+def test_distinct_query_except_all(frames):
+
+    duckdb = pytest.importorskip("duckdb")
+    left, right = frames
+    con = duckdb.connect()
+    con.register("left_frame", left)
+    con.register("right_frame", right)
+    con.execute("CREATE TABLE l AS SELECT * FROM left_frame")
+    con.execute("CREATE TABLE r AS SELECT * FROM right_frame")
+
+    out_left, out_right = sql.distinct_query(con, "l", "r")
+    expected_left, expected_right = core.distinct(left, right)
+
+    assert len(out_left) == len(expected_left)
+    assert len(out_right) == len(expected_right)
+
+
+def test_distinct_query_dialect(connection):
+
+    with pytest.raises(ValueError):
+        sql.distinct_query(connection, "l", "r", dialect="oracle")